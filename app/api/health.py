@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException
 import psycopg2
 
 from app.config.settings import DB_CFG
+from app.services.local_index import get_local_index
 from app.services.qdrant import get_qdrant
 
 router = APIRouter()
@@ -28,8 +29,24 @@ def health():
     except Exception as exc:
         checks["qdrant"] = {"ok": False, "error": str(exc)}
 
-    ok = all(item["ok"] for item in checks.values())
-    payload = {"status": "ok" if ok else "degraded", "checks": checks}
+    try:
+        local = get_local_index()
+        if local is not None:
+            checks["local_index"] = {
+                "ok": True,
+                "points": len(local),
+                "source": local.manifest.get("source"),
+                "created": local.manifest.get("created"),
+            }
+    except Exception as exc:
+        checks["local_index"] = {"ok": False, "error": str(exc)}
+
+    # Search still works on the local index while Qdrant is down, so that
+    # alone is reported as degraded without failing the health check.
+    vector_ok = checks["qdrant"]["ok"] or checks.get("local_index", {}).get("ok", False)
+    ok = checks["database"]["ok"] and vector_ok
+    healthy = all(item["ok"] for item in checks.values())
+    payload = {"status": "ok" if healthy else "degraded", "checks": checks}
     if not ok:
         raise HTTPException(status_code=503, detail=payload)
     return payload
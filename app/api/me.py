@@ -1,4 +1,5 @@
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
@@ -102,6 +103,12 @@ def put_my_profile(payload: UserProfileInput, user=Depends(_get_user)):
 def get_my_recommendations(
     limit: int = Query(20, ge=1, le=50),
     offset: int = Query(0, ge=0),
+    tag: Optional[List[str]] = Query(None),
+    session: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    new_only: bool = Query(False),
+    updated_after: Optional[date] = Query(None),
+    vector: Optional[str] = Query(None, regex="^(text|summary|title|blend)$"),
     user=Depends(_get_user),
 ):
     item = get_profile(user["sub"])
@@ -113,6 +120,14 @@ def get_my_recommendations(
         demographics=item.get("demographics", {}),
         limit=limit,
         offset=offset,
+        filters={
+            "tags": tag,
+            "session_id": session,
+            "status_code": status,
+            "is_new_bill": True if new_only else None,
+            "updated_after": updated_after,
+        },
+        vector_name=vector,
     )
     return RecommendationResponse(recommendations=recommendations)
 
@@ -1,3 +1,6 @@
+from datetime import date
+from typing import List, Optional
+
 from fastapi import APIRouter, Query
 from app.services.search import semantic_search, title_search
 
@@ -9,7 +12,21 @@ def search(
     mode: str = Query("semantic", regex="^(semantic|title)$"),
     limit: int = Query(20, ge=1, le=50),
     offset: int = Query(0, ge=0),
+    tag: Optional[List[str]] = Query(None, description="Only bills with any of these tags (semantic mode)"),
+    session: Optional[List[str]] = Query(None, description="Parliament session ids, e.g. 44-1"),
+    status: Optional[List[str]] = Query(None, description="Bill status codes"),
+    new_only: bool = Query(False),
+    updated_after: Optional[date] = Query(None),
+    vector: Optional[str] = Query(None, regex="^(text|summary|title|blend)$",
+                                  description="Named vector to search (default: SEARCH_VECTOR)"),
 ):
     if mode == "title":
         return title_search(q, limit, offset)
-    return semantic_search(q, limit, offset)
+    filters = {
+        "tags": tag,
+        "session_id": session,
+        "status_code": status,
+        "is_new_bill": True if new_only else None,
+        "updated_after": updated_after,
+    }
+    return semantic_search(q, limit, offset, filters=filters, vector_name=vector)
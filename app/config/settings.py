@@ -29,6 +29,15 @@ def _load_ssm_parameters():
     except Exception:
         return {}
 
+def _parse_weights(raw: str) -> dict:
+    """"summary:0.5,title:0.2" -> {"summary": 0.5, "title": 0.2}"""
+    weights = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition(":")
+        if name.strip():
+            weights[name.strip()] = float(weight or 1.0)
+    return weights
+
 @lru_cache
 def get_settings():
     ssm_params = _load_ssm_parameters()
@@ -43,10 +52,42 @@ def get_settings():
         },
         "qdrant": {
             "host": os.getenv("QDRANT_HOST", "localhost"),
-            "port": 6333
+            "port": int(os.getenv("QDRANT_PORT", "6333")),
+            "grpc_port": int(os.getenv("QDRANT_GRPC_PORT", "6334")),
+            # gRPC skips JSON encoding of vectors/payloads on both ends.
+            "prefer_grpc": os.getenv("QDRANT_PREFER_GRPC", "false").lower() in {"1", "true", "yes"},
+            "timeout": int(os.getenv("QDRANT_TIMEOUT", "5")),
         },
+        # Qdrant aliases; summaries/generate_embeddings.py --rebuild swaps them
+        # onto a new versioned collection without interrupting search.
         "collections": {
             "bill_embeddings": "bill_text_embeddings",
+            "bill_chunks": "bill_chunk_embeddings",
+        },
+        "search": {
+            # Search the passage collection and group hits by bill_id.
+            "chunked": os.getenv("SEARCH_CHUNKED", "false").lower() in {"1", "true", "yes"},
+            # Named vector to query: text, summary, title or blend. On an old
+            # single-vector collection app/services/qdrant.py uses the
+            # unnamed vector instead, so this default works before and after
+            # summaries/generate_embeddings.py --rebuild.
+            "vector": os.getenv("SEARCH_VECTOR", "summary"),
+            "blend": _parse_weights(os.getenv("SEARCH_BLEND", "summary:0.5,text:0.3,title:0.2")),
+            # HNSW beam width at query time (None: Qdrant default, the
+            # collection's ef_construct) and rescoring for quantized versions.
+            "hnsw_ef": int(os.getenv("SEARCH_HNSW_EF")) if os.getenv("SEARCH_HNSW_EF") else None,
+            "rescore": os.getenv("SEARCH_RESCORE", "true").lower() in {"1", "true", "yes"},
+            "oversampling": float(os.getenv("SEARCH_OVERSAMPLING", "2.0")),
+        },
+        "vector_backend": {
+            # "qdrant", or "numpy" for exact in-process search over a snapshot
+            # written by retrieval/snapshot.py (no Qdrant needed for local dev).
+            "backend": os.getenv("VECTOR_BACKEND", "qdrant"),
+            "local_index_path": os.getenv("LOCAL_INDEX_PATH", ""),
+            # Seconds between checks of the snapshot manifest for a new version.
+            "refresh_seconds": int(os.getenv("LOCAL_INDEX_REFRESH", "30")),
+            # Answer from the snapshot when Qdrant is unreachable.
+            "fallback": os.getenv("LOCAL_INDEX_FALLBACK", "true").lower() in {"1", "true", "yes"},
         },
         "auth": {
             "cognito_region": AWS_REGION,
@@ -14,6 +14,11 @@ async def lifespan(application: FastAPI):
     from app.services.embeddings import get_fusion
     get_fusion()
     print("[startup] SentenceTransformer model loaded")
+    from app.services.db import ensure_tag_schema
+    try:
+        ensure_tag_schema()
+    except Exception as exc:
+        print(f"[startup] could not check bills_billtag: {exc}")
     yield
 
 
@@ -1,9 +1,9 @@
-import json
 import psycopg2
 import psycopg2.pool
 import os
 from app.config.settings import DB_CFG
 from typing import List, Dict, Optional
+from tagging.tagger import BILLTAG_TABLE, ensure_billtag_table, sync_billtags
 
 _pool = psycopg2.pool.SimpleConnectionPool(1, 10, **DB_CFG)
 
@@ -28,32 +28,101 @@ def _build_media_url(path: Optional[str]) -> Optional[str]:
     return f"{base}/{cleaned}"
 
 
-def _extract_tag_labels(raw_tags, min_score: float = 0.3, max_tags: int = 2) -> Optional[List[str]]:
-    if not raw_tags:
-        return None
-    tags_dict = raw_tags
-    if isinstance(raw_tags, str):
-        try:
-            tags_dict = json.loads(raw_tags)
-        except json.JSONDecodeError:
-            return None
-    if not isinstance(tags_dict, dict):
-        return None
-    sorted_tags = sorted(tags_dict.items(), key=lambda item: item[1], reverse=True)
-    labels = [
-        label
-        for label, score in sorted_tags
-        if isinstance(score, (int, float)) and score >= min_score
-    ]
-    labels = labels[:max_tags]
-    return labels or None
+TAG_MIN_SCORE = 0.3
+TAG_MAX_COUNT = 2
+# Tags a bill matches in a tag filter; same top-N as the Qdrant payload
+# (PAYLOAD_MAX_TAGS in summaries/generate_embeddings.py).
+FILTER_TAG_MAX_COUNT = 3
+
+
+def _top_tags_sql(bill_id_expr: str) -> str:
+    # Top-N labels from bills_billtag; served by its (bill_id, score DESC) index.
+    return f"""(
+        SELECT array_agg(t.tag ORDER BY t.score DESC)
+        FROM (
+            SELECT tag, score
+            FROM bills_billtag
+            WHERE bill_id = {bill_id_expr} AND score >= {TAG_MIN_SCORE}
+            ORDER BY score DESC
+            LIMIT {TAG_MAX_COUNT}
+        ) t
+    )"""
+
+
+def _tag_labels(tags) -> Optional[List[str]]:
+    return list(tags) if tags else None
+
+
+def _as_list(values) -> List:
+    return [values] if isinstance(values, str) else list(values or [])
+
+
+def _filters_sql(filters: Optional[Dict]):
+    """
+    SQL equivalent of app.services.qdrant._build_filter over bills_billtext bt
+    JOIN bills_bill b. Returns (conditions, params) to AND into a WHERE clause.
+    """
+    conditions, params = [], []
+    if not filters:
+        return conditions, params
+    tags = _as_list(filters.get("tags"))
+    if tags:
+        conditions.append(f"""EXISTS (
+            SELECT 1 FROM (
+                SELECT tag FROM bills_billtag
+                WHERE bill_id = bt.bill_id AND score >= {TAG_MIN_SCORE}
+                ORDER BY score DESC
+                LIMIT {FILTER_TAG_MAX_COUNT}
+            ) t
+            WHERE t.tag = ANY(%s)
+        )""")
+        params.append(tags)
+    for key in ("session_id", "status_code"):
+        values = _as_list(filters.get(key))
+        if values:
+            conditions.append(f"b.{key} = ANY(%s)")
+            params.append(values)
+    if filters.get("is_new_bill") is not None:
+        conditions.append("bt.is_new_bill = %s")
+        params.append(bool(filters["is_new_bill"]))
+    if filters.get("updated_after"):
+        conditions.append("b.status_date >= %s")
+        params.append(filters["updated_after"])
+    if filters.get("updated_before"):
+        conditions.append("b.status_date <= %s")
+        params.append(filters["updated_before"])
+    return conditions, params
+
+
+def ensure_tag_schema():
+    """
+    Create and backfill bills_billtag if tagging/migrate_tags_jsonb.py hasn't
+    run yet, so the tag subqueries above don't fail on a fresh deploy. The
+    advisory lock keeps concurrent workers from racing on the CREATE.
+    """
+    conn = _get_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (BILLTAG_TABLE,))
+        cur.execute("SELECT to_regclass(%s)", (BILLTAG_TABLE,))
+        if cur.fetchone()[0] is None:
+            ensure_billtag_table(cur)
+            sync_billtags(cur)
+            print(f"[startup] created {BILLTAG_TABLE} from llm_tags")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        _put_conn(conn)
 
 def get_bill_info(bill_id: int):
     conn = _get_conn()
     try:
         cur = conn.cursor()
-        cur.execute("""
-            SELECT bt.llm_summary, bt.summary_en, b.name_en, b.number, b.session_id, b.status_date, bt.llm_tags, b.status_code, bt.is_new_bill
+        cur.execute(f"""
+            SELECT bt.llm_summary, bt.summary_en, b.name_en, b.number, b.session_id, b.status_date,
+                   {_top_tags_sql("bt.bill_id")}, b.status_code, bt.is_new_bill
             FROM bills_billtext bt
             JOIN bills_bill b ON bt.bill_id = b.id
             WHERE bt.bill_id = %s;
@@ -74,7 +143,7 @@ def get_bill_info(bill_id: int):
     bill_number = row[3]
     session_id = row[4]
     status_date = row[5]
-    tags = _extract_tag_labels(row[6])
+    tags = _tag_labels(row[6])
     status_code = row[7]
     is_new_bill = row[8]
     return {
@@ -96,8 +165,9 @@ def get_bills_info(bill_ids: List[int]) -> List[Dict]:
     conn = _get_conn()
     try:
         cur = conn.cursor()
-        cur.execute("""
-            SELECT bt.bill_id, bt.llm_summary, bt.summary_en, b.name_en, b.number, b.session_id, b.status_date, bt.llm_tags, b.status_code, bt.is_new_bill
+        cur.execute(f"""
+            SELECT bt.bill_id, bt.llm_summary, bt.summary_en, b.name_en, b.number, b.session_id, b.status_date,
+                   {_top_tags_sql("bt.bill_id")}, b.status_code, bt.is_new_bill
             FROM bills_billtext bt
             JOIN bills_bill b ON bt.bill_id = b.id
             WHERE bt.bill_id = ANY(%s);
@@ -122,7 +192,7 @@ def get_bills_info(bill_ids: List[int]) -> List[Dict]:
 
     info_map = {}
     for row in rows:
-        bill_id, llm_summary, summary_en, title, bill_number, session_id, status_date, llm_tags, status_code, is_new_bill = row
+        bill_id, llm_summary, summary_en, title, bill_number, session_id, status_date, tags, status_code, is_new_bill = row
         summary = llm_summary or summary_en or "[No summary found]"
         info_map[bill_id] = {
             "bill_id": bill_id,
@@ -131,7 +201,7 @@ def get_bills_info(bill_ids: List[int]) -> List[Dict]:
             "bill_number": bill_number,
             "parliament_session": session_id,
             "last_updated": status_date.isoformat() if status_date else None,
-            "tags": _extract_tag_labels(llm_tags),
+            "tags": _tag_labels(tags),
             "status_code": status_code,
             "is_new_bill": is_new_bill,
         }
@@ -155,26 +225,29 @@ def get_bills_info(bill_ids: List[int]) -> List[Dict]:
     return output
 
 
-def get_recent_bills(limit: int = 20, offset: int = 0) -> List[Dict]:
+def get_recent_bills(limit: int = 20, offset: int = 0, filters: Optional[Dict] = None) -> List[Dict]:
+    conditions, params = _filters_sql(filters)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
     conn = _get_conn()
     try:
         cur = conn.cursor()
-        cur.execute("""
+        cur.execute(f"""
             SELECT bill_id, llm_summary, summary_en, name_en,
-                   number, session_id, status_date, llm_tags,
+                   number, session_id, status_date, {_top_tags_sql("sub.bill_id")},
                    status_code, is_new_bill
             FROM (
                 SELECT DISTINCT ON (bt.bill_id)
                        bt.bill_id, bt.llm_summary, bt.summary_en, b.name_en,
-                       b.number, b.session_id, b.status_date, bt.llm_tags,
+                       b.number, b.session_id, b.status_date,
                        b.status_code, bt.is_new_bill
                 FROM bills_billtext bt
                 JOIN bills_bill b ON bt.bill_id = b.id
+                {where}
                 ORDER BY bt.bill_id, b.status_date DESC NULLS LAST
             ) sub
             ORDER BY status_date DESC NULLS LAST
             LIMIT %s OFFSET %s;
-        """, (limit, offset))
+        """, (*params, limit, offset))
         rows = cur.fetchall()
         cur.close()
     except Exception as exc:
@@ -185,7 +258,7 @@ def get_recent_bills(limit: int = 20, offset: int = 0) -> List[Dict]:
 
     output = []
     for row in rows:
-        bill_id, llm_summary, summary_en, title, bill_number, session_id, status_date, llm_tags, status_code, is_new_bill = row
+        bill_id, llm_summary, summary_en, title, bill_number, session_id, status_date, tags, status_code, is_new_bill = row
         output.append({
             "bill_id": bill_id,
             "summary": llm_summary or summary_en or "[No summary found]",
@@ -193,7 +266,7 @@ def get_recent_bills(limit: int = 20, offset: int = 0) -> List[Dict]:
             "bill_number": bill_number,
             "parliament_session": session_id,
             "last_updated": status_date.isoformat() if status_date else None,
-            "tags": _extract_tag_labels(llm_tags),
+            "tags": _tag_labels(tags),
             "status_code": status_code,
             "is_new_bill": is_new_bill,
         })
@@ -205,14 +278,14 @@ def search_bills_by_title(query: str, limit: int = 20, offset: int = 0) -> List[
     try:
         cur = conn.cursor()
         pattern = f"%{query}%"
-        cur.execute("""
+        cur.execute(f"""
             SELECT bill_id, llm_summary, summary_en, name_en,
-                   number, session_id, status_date, llm_tags,
+                   number, session_id, status_date, {_top_tags_sql("sub.bill_id")},
                    status_code, is_new_bill
             FROM (
                 SELECT DISTINCT ON (b.status_date, b.name_en)
                        bt.bill_id, bt.llm_summary, bt.summary_en, b.name_en,
-                       b.number, b.session_id, b.status_date, bt.llm_tags,
+                       b.number, b.session_id, b.status_date,
                        b.status_code, bt.is_new_bill
                 FROM bills_billtext bt
                 JOIN bills_bill b ON bt.bill_id = b.id
@@ -232,7 +305,7 @@ def search_bills_by_title(query: str, limit: int = 20, offset: int = 0) -> List[
 
     output = []
     for row in rows:
-        bill_id, llm_summary, summary_en, title, bill_number, session_id, status_date, llm_tags, status_code, is_new_bill = row
+        bill_id, llm_summary, summary_en, title, bill_number, session_id, status_date, tags, status_code, is_new_bill = row
         output.append({
             "bill_id": bill_id,
             "summary": llm_summary or summary_en or "[No summary found]",
@@ -240,7 +313,7 @@ def search_bills_by_title(query: str, limit: int = 20, offset: int = 0) -> List[
             "bill_number": bill_number,
             "parliament_session": session_id,
             "last_updated": status_date.isoformat() if status_date else None,
-            "tags": _extract_tag_labels(llm_tags),
+            "tags": _tag_labels(tags),
             "status_code": status_code,
             "is_new_bill": is_new_bill,
         })
@@ -0,0 +1,187 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.config.settings import settings
+from retrieval.snapshot import DEFAULT_VECTOR, load_snapshot, read_manifest
+
+# Rows multiplied per matmul; bounds the float32 working set when the
+# matrix is a memory map (or float16 on disk).
+BLOCK_ROWS = 65536
+REFRESH_SECONDS = settings["vector_backend"]["refresh_seconds"]
+
+
+@dataclass
+class LocalHit:
+    """Same fields semantic_search / recommendations read from a Qdrant ScoredPoint."""
+    id: int
+    score: float
+    payload: Dict = field(default_factory=dict)
+
+
+def _as_datetime(value) -> datetime:
+    """
+    Same normalization as app.services.qdrant._as_datetime (dates become
+    midnight), with aware values converted to naive UTC as Qdrant does, so
+    both backends agree on range boundaries.
+    """
+    if isinstance(value, datetime):
+        result = value
+    elif isinstance(value, date):
+        result = datetime.combine(value, datetime.min.time())
+    else:
+        result = datetime.fromisoformat(str(value))
+    if result.tzinfo is not None:
+        result = result.astimezone(timezone.utc).replace(tzinfo=None)
+    return result
+
+
+def matches_filters(payload: Dict, filters: Optional[Dict]) -> bool:
+    """In-process equivalent of app.services.qdrant._build_filter."""
+    if not filters:
+        return True
+    for key in ("tags", "session_id", "status_code"):
+        wanted = filters.get(key)
+        if isinstance(wanted, str):
+            wanted = [wanted]
+        if wanted:
+            have = payload.get(key)
+            have = set(have) if isinstance(have, list) else {have}
+            if not have & set(wanted):
+                return False
+    if filters.get("is_new_bill") is not None:
+        if bool(payload.get("is_new_bill")) != bool(filters["is_new_bill"]):
+            return False
+    after, before = filters.get("updated_after"), filters.get("updated_before")
+    if after or before:
+        status_date = payload.get("status_date")
+        if not status_date:
+            return False
+        status_date = _as_datetime(status_date)
+        if after and status_date < _as_datetime(after):
+            return False
+        if before and status_date > _as_datetime(before):
+            return False
+    return True
+
+
+def _snapshot_version(manifest: Dict):
+    return manifest.get("source"), manifest.get("created")
+
+
+class LocalIndex:
+    """
+    Exact cosine search over a snapshot written by retrieval/snapshot.py.
+    Vectors are unit-normalized memory maps, so a query is one matmul per
+    block of rows followed by argpartition top-k. For a few thousand bills
+    this is faster than a network round trip to Qdrant.
+    """
+
+    def __init__(self, path: str, mmap: bool = True):
+        self.path = path
+        self.manifest, self.ids, self.vectors, self.payloads = load_snapshot(path, mmap=mmap)
+        self.version = _snapshot_version(self.manifest)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _matmul(self, matrix, queries):
+        out = np.empty((matrix.shape[0], queries.shape[0]), dtype=np.float32)
+        for start in range(0, matrix.shape[0], BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + BLOCK_ROWS], dtype=np.float32)
+            out[start:start + BLOCK_ROWS] = block @ queries.T
+        return out
+
+    def _scores(self, queries, vector_name: Optional[str], blend: Optional[Dict[str, float]]):
+        """(rows, queries) cosine scores."""
+        if vector_name == "blend" and blend:
+            scores = np.zeros((len(self.ids), queries.shape[0]), dtype=np.float32)
+            for name, weight in blend.items():
+                if name in self.vectors:
+                    scores += weight * self._matmul(self.vectors[name], queries)
+            return scores
+        name = vector_name if vector_name in self.vectors else None
+        if name is None:
+            name = DEFAULT_VECTOR if DEFAULT_VECTOR in self.vectors else next(iter(self.vectors))
+        return self._matmul(self.vectors[name], queries)
+
+    def _mask(self, filters: Optional[Dict]):
+        if not filters:
+            return None
+        return np.fromiter(
+            (matches_filters(p, filters) for p in self.payloads), dtype=bool, count=len(self.payloads)
+        )
+
+    def search_batch(self, vectors: Sequence, limit: int, offset: int = 0, filters: Optional[Dict] = None,
+                     vector_name: Optional[str] = None,
+                     blend: Optional[Dict[str, float]] = None) -> List[List[LocalHit]]:
+        """Top hits for several query vectors with a single matmul per block."""
+        queries = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        scores = self._scores(queries / norms, vector_name, blend)
+        mask = self._mask(filters)
+        if mask is not None:
+            scores[~mask] = -np.inf
+
+        n = scores.shape[0]
+        k = min(offset + limit, n)
+        if k <= 0:
+            return [[] for _ in range(queries.shape[0])]
+        top = np.argpartition(-scores, k - 1, axis=0)[:k] if k < n else np.tile(
+            np.arange(n)[:, None], (1, scores.shape[1])
+        )
+
+        results = []
+        for column in range(scores.shape[1]):
+            rows = top[:, column]
+            rows = rows[np.argsort(-scores[rows, column], kind="stable")][offset:]
+            results.append([
+                LocalHit(id=int(self.ids[i]), score=float(scores[i, column]), payload=self.payloads[i])
+                for i in rows
+                if np.isfinite(scores[i, column])
+            ])
+        return results
+
+    def search(self, vector, limit: int, offset: int = 0, filters: Optional[Dict] = None,
+               vector_name: Optional[str] = None,
+               blend: Optional[Dict[str, float]] = None) -> List[LocalHit]:
+        return self.search_batch([vector], limit, offset, filters, vector_name, blend)[0]
+
+
+_state = {"index": None, "checked": None}
+_lock = threading.Lock()
+
+
+def get_local_index() -> Optional[LocalIndex]:
+    """
+    The snapshot index, reloaded when the manifest's version (source
+    collection + export time) changes. Checked at most every
+    LOCAL_INDEX_REFRESH seconds; a failed reload keeps the current index.
+    summaries/generate_embeddings.py re-exports the snapshot after every
+    index change or alias swap when LOCAL_INDEX_PATH (or --snapshot) is set.
+    """
+    path = settings["vector_backend"]["local_index_path"]
+    if not path:
+        return None
+    now = time.monotonic()
+    with _lock:
+        checked = _state["checked"]
+        if checked is not None and now - checked < REFRESH_SECONDS:
+            return _state["index"]
+        _state["checked"] = now
+        current = _state["index"]
+        try:
+            version = _snapshot_version(read_manifest(path))
+            if current is None or current.version != version:
+                _state["index"] = LocalIndex(path)
+                print(f"[local_index] loaded {len(_state['index'])} points from {path} (version {version})")
+        except FileNotFoundError:
+            pass
+        except Exception as exc:
+            print(f"[local_index] reload failed, keeping current index: {exc}")
+        return _state["index"]
@@ -1,23 +1,216 @@
-from qdrant_client import QdrantClient
+from datetime import date, datetime, time
 from functools import lru_cache
+from typing import Dict, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    DatetimeRange,
+    FieldCondition,
+    Filter,
+    MatchAny,
+    MatchValue,
+    NamedVector,
+    QuantizationSearchParams,
+    SearchParams,
+    SearchRequest,
+)
 from app.config.settings import settings
+from app.services.local_index import get_local_index
 
 COLLECTION_NAME = settings["collections"]["bill_embeddings"]
+CHUNK_COLLECTION_NAME = settings["collections"]["bill_chunks"]
+CHUNKED_SEARCH = settings["search"]["chunked"]
+VECTOR_NAMES = ("text", "summary", "title")
+DEFAULT_VECTOR = settings["search"]["vector"]
+BLEND_WEIGHTS = settings["search"]["blend"]
+# Each named search in a blend fetches this many times the requested depth
+# so bills that rank well on only one vector still get a fused score.
+BLEND_OVERSAMPLE = 3
+
+VECTOR_BACKEND = settings["vector_backend"]["backend"]
+LOCAL_FALLBACK = settings["vector_backend"]["fallback"]
+
+# Ignored by Qdrant for collections without quantization.
+SEARCH_PARAMS = SearchParams(
+    hnsw_ef=settings["search"]["hnsw_ef"],
+    quantization=QuantizationSearchParams(
+        rescore=settings["search"]["rescore"],
+        oversampling=settings["search"]["oversampling"],
+    ),
+)
+
+# Payload fields written by summaries/generate_embeddings.py (all indexed).
+LIST_FILTER_FIELDS = ("tags", "session_id", "status_code")
 
 @lru_cache
 def get_qdrant() -> QdrantClient:
+    cfg = settings["qdrant"]
     return QdrantClient(
-        host=settings["qdrant"]["host"],
-        port=settings["qdrant"]["port"],
+        host=cfg["host"],
+        port=cfg["port"],
+        grpc_port=cfg["grpc_port"],
+        prefer_grpc=cfg["prefer_grpc"],
+        timeout=cfg["timeout"],
     )
 
-def search_vectors(vector, limit: int, offset: int = 0):
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time.min)
+    return datetime.fromisoformat(str(value))
+
+def _build_filter(filters: Optional[Dict]) -> Optional[Filter]:
+    """
+    Turn a plain filter dict into a Qdrant Filter. Empty or None values are
+    ignored, so callers can pass query parameters through unchanged:
+
+        tags / session_id / status_code: list of values (match any)
+        is_new_bill: bool
+        updated_after / updated_before: date or ISO string, on status_date
+    """
+    if not filters:
+        return None
+
+    must = []
+    for key in LIST_FILTER_FIELDS:
+        values = filters.get(key)
+        if isinstance(values, str):
+            values = [values]
+        if values:
+            must.append(FieldCondition(key=key, match=MatchAny(any=list(values))))
+
+    if filters.get("is_new_bill") is not None:
+        must.append(FieldCondition(key="is_new_bill", match=MatchValue(value=bool(filters["is_new_bill"]))))
+
+    after, before = filters.get("updated_after"), filters.get("updated_before")
+    if after or before:
+        must.append(FieldCondition(
+            key="status_date",
+            range=DatetimeRange(
+                gte=_as_datetime(after) if after else None,
+                lte=_as_datetime(before) if before else None,
+            ),
+        ))
+
+    return Filter(must=must) if must else None
+
+@lru_cache
+def _has_named_vectors() -> bool:
+    """
+    Whether COLLECTION_NAME uses named vectors. A collection built before
+    they existed has one unnamed vector, which every name then resolves to.
+    Cleared when a search fails, so an alias swap is picked up.
+    """
+    vectors = get_qdrant().get_collection(COLLECTION_NAME).config.params.vectors
+    return isinstance(vectors, dict)
+
+def _query_vector(vector, name: Optional[str]):
+    return NamedVector(name=name, vector=vector) if name else vector
+
+def search_vectors(vector, limit: int, offset: int = 0, filters: Optional[Dict] = None,
+                   chunked: Optional[bool] = None, vector_name: Optional[str] = None):
+    """
+    Top bills for ``vector``. ``vector_name`` picks the named vector to
+    search ("text", "summary", "title") or "blend"; defaults to
+    DEFAULT_VECTOR, which is set by the SEARCH_VECTOR env var.
+
+    With VECTOR_BACKEND=numpy the snapshot index answers every query; with
+    the Qdrant backend it takes over (exact, unchunked) when Qdrant fails.
+    """
+    name = DEFAULT_VECTOR if vector_name is None else vector_name
+    if VECTOR_BACKEND in ("numpy", "local"):
+        return _local_search(vector, limit, offset, filters, name)
+    try:
+        return _qdrant_search(vector, limit, offset, filters, chunked, name)
+    except Exception as exc:
+        _has_named_vectors.cache_clear()
+        local = get_local_index() if LOCAL_FALLBACK else None
+        if local is None:
+            raise
+        print(f"[qdrant] search failed ({exc}); serving from local index")
+        return local.search(vector, limit, offset, filters, vector_name=name, blend=BLEND_WEIGHTS)
+
+def _local_search(vector, limit: int, offset: int, filters: Optional[Dict], name: Optional[str]):
+    local = get_local_index()
+    if local is None:
+        raise RuntimeError(f"VECTOR_BACKEND={VECTOR_BACKEND} but no snapshot at LOCAL_INDEX_PATH")
+    return local.search(vector, limit, offset, filters, vector_name=name, blend=BLEND_WEIGHTS)
+
+def _qdrant_search(vector, limit: int, offset: int, filters: Optional[Dict],
+                   chunked: Optional[bool], name: Optional[str]):
+    if CHUNKED_SEARCH if chunked is None else chunked:
+        return search_chunks(vector, limit, offset, filters)
+    if name and not _has_named_vectors():
+        name = None
+    if name == "blend":
+        return search_blended(vector, limit, offset, filters)
     client = get_qdrant()
     return client.search(
         collection_name=COLLECTION_NAME,
-        query_vector=vector,
+        query_vector=_query_vector(vector, name),
+        query_filter=_build_filter(filters),
+        search_params=SEARCH_PARAMS,
         limit=limit,
         offset=offset,
         with_payload=True,
         with_vectors=False,
     )
+
+def search_blended(vector, limit: int, offset: int = 0, filters: Optional[Dict] = None,
+                   weights: Optional[Dict[str, float]] = None):
+    """
+    Weighted sum of cosine scores across named vectors, fetched in one
+    search_batch round trip. A bill missing from one list contributes 0 there.
+    """
+    weights = weights or BLEND_WEIGHTS
+    depth = (offset + limit) * BLEND_OVERSAMPLE
+    query_filter = _build_filter(filters)
+    client = get_qdrant()
+    results = client.search_batch(
+        collection_name=COLLECTION_NAME,
+        requests=[
+            SearchRequest(
+                vector=NamedVector(name=name, vector=vector),
+                filter=query_filter,
+                params=SEARCH_PARAMS,
+                limit=depth,
+                with_payload=True,
+                with_vector=False,
+            )
+            for name in weights
+        ],
+    )
+
+    fused = {}
+    for weight, hits in zip(weights.values(), results):
+        for hit in hits:
+            entry = fused.setdefault(hit.id, [hit, 0.0])
+            entry[1] += weight * hit.score
+
+    ranked = sorted(fused.values(), key=lambda entry: entry[1], reverse=True)
+    output = []
+    for hit, score in ranked[offset:offset + limit]:
+        hit.score = score
+        output.append(hit)
+    return output
+
+def search_chunks(vector, limit: int, offset: int = 0, filters: Optional[Dict] = None):
+    """
+    Search passage points and keep the best-scoring passage per bill
+    (max-pooling), so a bill ranks by its most relevant section.
+    search_groups has no offset, so offset + limit groups are fetched.
+    """
+    client = get_qdrant()
+    result = client.search_groups(
+        collection_name=CHUNK_COLLECTION_NAME,
+        query_vector=vector,
+        query_filter=_build_filter(filters),
+        search_params=SEARCH_PARAMS,
+        group_by="bill_id",
+        limit=offset + limit,
+        group_size=1,
+        with_payload=True,
+        with_vectors=False,
+    )
+    return [group.hits[0] for group in result.groups[offset:] if group.hits]
@@ -1,8 +1,8 @@
 import numpy as np
 import torch
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from app.services.qdrant import get_qdrant, COLLECTION_NAME
+from app.services.qdrant import search_vectors
 from app.services.embeddings import get_fusion
 from app.services.db import get_bills_info, get_recent_bills
 from app.models.schemas import BillRecommendation
@@ -44,9 +44,9 @@ def _build_recommendations(hits) -> List[BillRecommendation]:
     print(f"[recommendations] bill_ids={bill_ids}")
     return output
 
-def _fused_search(interests: List[str], demographics: Dict, limit: int, offset: int):
+def _fused_search(interests: List[str], demographics: Dict, limit: int, offset: int,
+                  filters: Optional[Dict] = None, vector_name: Optional[str] = None):
     fusion = get_fusion()
-    qdrant = get_qdrant()
 
     fused_vector = fusion.create_fused_embedding(
         interests=interests,
@@ -56,19 +56,13 @@ def _fused_search(interests: List[str], demographics: Dict, limit: int, offset:
     if fused_vector is None:
         return None
 
-    return qdrant.search(
-        collection_name=COLLECTION_NAME,
-        query_vector=fused_vector.tolist(),
-        limit=limit,
-        offset=offset,
-        with_payload=True,
-        with_vectors=False,
-    )
+    return search_vectors(fused_vector.tolist(), limit, offset, filters=filters, vector_name=vector_name)
 
-def recommend_bills(interests, demographics, limit, offset: int = 0):
-    hits = _fused_search(interests, demographics, limit, offset)
+def recommend_bills(interests, demographics, limit, offset: int = 0, filters: Optional[Dict] = None,
+                    vector_name: Optional[str] = None):
+    hits = _fused_search(interests, demographics, limit, offset, filters, vector_name)
     if hits is None:
-        rows = get_recent_bills(limit=limit, offset=offset)
+        rows = get_recent_bills(limit=limit, offset=offset, filters=filters)
         return [
             BillRecommendation(
                 bill_id=r["bill_id"],
@@ -1,12 +1,15 @@
+from typing import Dict, Optional
+
 from app.services.embeddings import get_model
 from app.services.qdrant import search_vectors
 from app.services.db import get_bill_info, search_bills_by_title
 
-def semantic_search(query: str, limit: int = 20, offset: int = 0):
+def semantic_search(query: str, limit: int = 20, offset: int = 0, filters: Optional[Dict] = None,
+                    vector_name: Optional[str] = None):
     model = get_model()
     vector = model.encode(query).tolist()
 
-    results = search_vectors(vector, limit, offset)
+    results = search_vectors(vector, limit, offset, filters=filters, vector_name=vector_name)
 
     output = []
     for hit in results:
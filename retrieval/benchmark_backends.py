@@ -0,0 +1,121 @@
+"""
+Latency of the NumPy snapshot backend vs Qdrant for the same queries.
+
+Loads a snapshot (retrieval/snapshot.py export) into the API's LocalIndex
+and times exact in-process search against a Qdrant search over the
+collection it was exported from, per query and batched, at several
+limits. Also reports how often Qdrant's top-k matches the exact result.
+
+  python retrieval/benchmark_backends.py --snapshot data/bill_snapshot
+  python retrieval/benchmark_backends.py --snapshot data/bill_snapshot --limits 10,50 --vector text
+
+If NumPy wins at our size, run the API with VECTOR_BACKEND=numpy and
+LOCAL_INDEX_PATH pointing at the snapshot.
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("AWS_SSM_ENABLED", "false")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import NamedVector
+
+from app.services.local_index import LocalIndex
+
+# --- Config ---
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+DEFAULT_LIMITS = "5,10,20,50"
+WARMUP = 10
+
+
+def percentiles(latencies):
+    latencies = np.asarray(latencies)
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+
+def time_numpy(index, queries, limit, vector_name):
+    for query in queries[:WARMUP]:
+        index.search(query, limit, vector_name=vector_name)
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = index.search(query, limit, vector_name=vector_name)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({hit.id for hit in hits})
+    return latencies, results
+
+
+def time_numpy_batched(index, queries, limit, vector_name):
+    start = time.perf_counter()
+    index.search_batch(queries, limit, vector_name=vector_name)
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def time_qdrant(qdrant, collection_name, queries, limit, vector_name):
+    def search(query):
+        return qdrant.search(
+            collection_name=collection_name,
+            query_vector=NamedVector(name=vector_name, vector=query) if vector_name else query,
+            limit=limit,
+            with_payload=True,
+            with_vectors=False,
+        )
+
+    for query in queries[:WARMUP]:
+        search(query)
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({int(hit.id) for hit in hits})
+    return latencies, results
+
+
+def main(snapshot, vector_name, n_queries, limits, seed):
+    start = time.perf_counter()
+    index = LocalIndex(snapshot)
+    load_ms = (time.perf_counter() - start) * 1000
+    collection_name = index.manifest["source"]
+    name = vector_name if vector_name in index.vectors else next(iter(index.vectors))
+    print(f"Snapshot {snapshot}: {len(index)} points, vectors {list(index.vectors)}, "
+          f"loaded in {load_ms:.1f} ms (memory-mapped)")
+
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(index), size=min(n_queries, len(index)), replace=False)
+    queries = np.asarray(index.vectors[name][rows], dtype=np.float32)
+    qdrant = QdrantClient(QDRANT_HOST, port=6333)
+    qdrant_name = None if name == "default" else name
+
+    print(f"\n  {'limit':>6}{'numpy p50':>11}{'numpy p95':>11}{'batched/q':>11}"
+          f"{'qdrant p50':>12}{'qdrant p95':>12}{'overlap':>9}")
+    for limit in limits:
+        np_lat, np_res = time_numpy(index, queries, limit, name)
+        batched = time_numpy_batched(index, queries, limit, name)
+        qd_lat, qd_res = time_qdrant(qdrant, collection_name, list(map(list, queries)), limit, qdrant_name)
+        overlap = np.mean([len(a & b) / limit for a, b in zip(np_res, qd_res)])
+        np50, np95 = percentiles(np_lat)
+        qd50, qd95 = percentiles(qd_lat)
+        print(f"  {limit:>6}{np50:>11.3f}{np95:>11.3f}{batched:>11.3f}"
+              f"{qd50:>12.3f}{qd95:>12.3f}{overlap:>9.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare NumPy snapshot search with Qdrant.")
+    parser.add_argument("--snapshot", required=True, help="Snapshot directory")
+    parser.add_argument("--vector", default="summary", help="Named vector to query")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limits", default=DEFAULT_LIMITS, help="Comma-separated search limits")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(
+        snapshot=args.snapshot,
+        vector_name=args.vector,
+        n_queries=args.queries,
+        limits=[int(v) for v in args.limits.split(",") if v.strip()],
+        seed=args.seed,
+    )
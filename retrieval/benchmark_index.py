@@ -0,0 +1,212 @@
+"""
+Recall vs latency of Qdrant index profiles on our own bill vectors.
+
+Copies the vectors of one named vector from the live collection into a
+throwaway collection per profile (HNSW m / ef_construct, on-disk storage,
+int8 scalar or product quantization), then runs the same sample of query
+vectors against each at several hnsw_ef values, with and without
+rescoring. Recall@k is measured against exact NumPy search.
+
+  python retrieval/benchmark_index.py
+  python retrieval/benchmark_index.py --vector text --queries 500 --k 20
+  python retrieval/benchmark_index.py --profiles m16,m16-int8 --ef 32,64,128
+
+Pick settings here, then build them with
+  python summaries/generate_embeddings.py --rebuild --hnsw-m ... --quantize ...
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    CollectionStatus,
+    CompressionRatio,
+    Distance,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    PointStruct,
+    ProductQuantization,
+    ProductQuantizationConfig,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+)
+
+# --- Config ---
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+COLLECTION_NAME = "bill_text_embeddings"
+BENCH_PREFIX = "bench_"
+VECTOR_SIZE = 384
+UPLOAD_BATCH = 256
+
+INT8 = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+)
+PQ = ProductQuantization(
+    product=ProductQuantizationConfig(compression=CompressionRatio.X16, always_ram=True)
+)
+
+# indexing_threshold=1 forces an HNSW graph even for a few thousand
+# vectors; "plain" keeps Qdrant's default, which stays brute force below
+# ~20 MB of vectors.
+PROFILES = {
+    "plain": {},
+    "m16": {"m": 16, "ef_construct": 100},
+    "m32": {"m": 32, "ef_construct": 200},
+    "m16-int8": {"m": 16, "ef_construct": 100, "quantization": INT8},
+    "m16-int8-disk": {"m": 16, "ef_construct": 100, "quantization": INT8, "on_disk": True},
+    "m32-int8": {"m": 32, "ef_construct": 200, "quantization": INT8},
+    "m16-pq": {"m": 16, "ef_construct": 100, "quantization": PQ},
+}
+DEFAULT_PROFILES = "plain,m16,m32,m16-int8,m16-int8-disk,m16-pq"
+DEFAULT_EF = "16,32,64,128,256"
+
+
+def load_vectors(qdrant, collection_name, vector_name):
+    ids, vectors = [], []
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=collection_name,
+            limit=1000,
+            offset=offset,
+            with_payload=False,
+            with_vectors=[vector_name] if vector_name else True,
+        )
+        for point in points:
+            vector = point.vector.get(vector_name) if isinstance(point.vector, dict) else point.vector
+            if vector is not None:
+                ids.append(int(point.id))
+                vectors.append(vector)
+        if offset is None:
+            break
+    return np.asarray(ids), np.asarray(vectors, dtype=np.float32)
+
+
+def exact_top_k(matrix, queries, k):
+    """Ground truth: cosine top-k by brute force over normalized vectors."""
+    norm = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = q @ norm.T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    return [set(row) for row in top]
+
+
+def build_profile(qdrant, name, profile, ids, matrix):
+    collection_name = f"{BENCH_PREFIX}{name}"
+    if qdrant.collection_exists(collection_name):
+        qdrant.delete_collection(collection_name=collection_name)
+    hnsw = {k: profile[k] for k in ("m", "ef_construct") if k in profile}
+    qdrant.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(
+            size=VECTOR_SIZE, distance=Distance.COSINE, on_disk=profile.get("on_disk", False)
+        ),
+        hnsw_config=HnswConfigDiff(**hnsw) if hnsw else None,
+        quantization_config=profile.get("quantization"),
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=1) if hnsw else None,
+    )
+    start = time.perf_counter()
+    for i in range(0, len(ids), UPLOAD_BATCH):
+        qdrant.upsert(
+            collection_name=collection_name,
+            points=[
+                PointStruct(id=int(point_id), vector=vector.tolist())
+                for point_id, vector in zip(ids[i:i + UPLOAD_BATCH], matrix[i:i + UPLOAD_BATCH])
+            ],
+            wait=True,
+        )
+    while qdrant.get_collection(collection_name).status != CollectionStatus.GREEN:
+        time.sleep(0.5)
+    return collection_name, time.perf_counter() - start
+
+
+def run_queries(qdrant, collection_name, ids, queries, truth, k, params):
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        hits = qdrant.search(
+            collection_name=collection_name,
+            query_vector=query.tolist(),
+            limit=k,
+            search_params=params,
+            with_payload=False,
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        expected_ids = {int(ids[i]) for i in expected}
+        recalls.append(len(expected_ids & {int(hit.id) for hit in hits}) / k)
+    latencies = np.asarray(latencies)
+    return float(np.mean(recalls)), float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+
+def main(collection_name, vector_name, n_queries, k, profile_names, ef_values, keep, seed):
+    qdrant = QdrantClient(QDRANT_HOST, port=6333)
+    ids, matrix = load_vectors(qdrant, collection_name, vector_name)
+    print(f"Loaded {len(ids)} '{vector_name or 'default'}' vectors from {collection_name}")
+
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(ids), size=min(n_queries, len(ids)), replace=False)
+    queries = matrix[sample]
+    truth = exact_top_k(matrix, queries, k)
+
+    rows = []
+    for name in profile_names:
+        profile = PROFILES[name]
+        bench_name, build_s = build_profile(qdrant, name, profile, ids, matrix)
+        print(f"\n[{name}] built {bench_name} in {build_s:.1f}s")
+
+        recall, p50, p95 = run_queries(qdrant, bench_name, ids, queries, truth, k, SearchParams(exact=True))
+        rows.append((name, "exact", "-", recall, p50, p95))
+
+        rescore_options = [True, False] if profile.get("quantization") else [None]
+        for ef in ef_values:
+            for rescore in rescore_options:
+                quant = (
+                    QuantizationSearchParams(rescore=rescore, oversampling=2.0)
+                    if rescore is not None else None
+                )
+                params = SearchParams(hnsw_ef=ef, quantization=quant)
+                recall, p50, p95 = run_queries(qdrant, bench_name, ids, queries, truth, k, params)
+                rows.append((name, ef, "-" if rescore is None else rescore, recall, p50, p95))
+
+        if not keep:
+            qdrant.delete_collection(collection_name=bench_name)
+
+    print(f"\n--- Recall@{k} vs latency ({len(queries)} queries, {len(ids)} vectors) ---")
+    print(f"  {'profile':<16}{'hnsw_ef':>8}{'rescore':>9}{'recall':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for name, ef, rescore, recall, p50, p95 in rows:
+        print(f"  {name:<16}{str(ef):>8}{str(rescore):>9}{recall:>9.3f}{p50:>9.2f}{p95:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Qdrant index profiles on bill vectors.")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--vector", default="summary", help="Named vector to copy ('' for unnamed)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--profiles", default=DEFAULT_PROFILES,
+                        help=f"Comma-separated, from: {', '.join(PROFILES)}")
+    parser.add_argument("--ef", default=DEFAULT_EF, help="Comma-separated hnsw_ef values")
+    parser.add_argument("--keep", action="store_true", help="Keep the bench_* collections")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    profile_names = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    unknown = [p for p in profile_names if p not in PROFILES]
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(unknown)}")
+    main(
+        collection_name=args.collection,
+        vector_name=args.vector or None,
+        n_queries=args.queries,
+        k=args.k,
+        profile_names=profile_names,
+        ef_values=[int(v) for v in args.ef.split(",") if v.strip()],
+        keep=args.keep,
+        seed=args.seed,
+    )
@@ -0,0 +1,94 @@
+"""
+Per-search latency of the Qdrant HTTP and gRPC transports.
+
+Runs the same query vectors through a REST client (port 6333) and a gRPC
+client (port 6334) at several limits, with and without payloads, so the
+difference between the two columns is roughly the cost of shipping and
+decoding payloads. Set QDRANT_PREFER_GRPC=true for the API if gRPC wins.
+
+  python retrieval/benchmark_transport.py
+  python retrieval/benchmark_transport.py --limits 10,20,50 --queries 500
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import NamedVector
+
+# --- Config ---
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+COLLECTION_NAME = "bill_text_embeddings"
+DEFAULT_LIMITS = "5,10,20,50"
+WARMUP = 10
+
+
+def sample_queries(qdrant, collection_name, vector_name, n):
+    """Stored vectors make realistic queries (same score distribution as real ones)."""
+    points, _ = qdrant.scroll(
+        collection_name=collection_name,
+        limit=n,
+        with_payload=False,
+        with_vectors=[vector_name] if vector_name else True,
+    )
+    return [
+        point.vector.get(vector_name) if isinstance(point.vector, dict) else point.vector
+        for point in points
+    ]
+
+
+def time_searches(client, collection_name, vector_name, queries, limit, with_payload):
+    def search(query):
+        return client.search(
+            collection_name=collection_name,
+            query_vector=NamedVector(name=vector_name, vector=query) if vector_name else query,
+            limit=limit,
+            with_payload=with_payload,
+            with_vectors=False,
+        )
+
+    for query in queries[:WARMUP]:
+        search(query)
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies = np.asarray(latencies)
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+
+def main(collection_name, vector_name, n_queries, limits, timeout):
+    clients = {
+        "http": QdrantClient(QDRANT_HOST, port=6333, timeout=timeout),
+        "grpc": QdrantClient(QDRANT_HOST, port=6333, grpc_port=6334, prefer_grpc=True, timeout=timeout),
+    }
+    queries = sample_queries(clients["http"], collection_name, vector_name, n_queries)
+    print(f"{len(queries)} queries against {collection_name} ('{vector_name or 'default'}' vector)")
+
+    print(f"\n  {'transport':<10}{'limit':>6}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p50 +payload':>14}{'p95 +payload':>14}{'payload ms':>12}")
+    for limit in limits:
+        for name, client in clients.items():
+            bare50, bare95 = time_searches(client, collection_name, vector_name, queries, limit, False)
+            full50, full95 = time_searches(client, collection_name, vector_name, queries, limit, True)
+            print(f"  {name:<10}{limit:>6}{bare50:>9.2f}{bare95:>9.2f}"
+                  f"{full50:>14.2f}{full95:>14.2f}{full50 - bare50:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare Qdrant HTTP and gRPC search latency.")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--vector", default="summary", help="Named vector to query ('' for unnamed)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limits", default=DEFAULT_LIMITS, help="Comma-separated search limits")
+    parser.add_argument("--timeout", type=int, default=5, help="Client timeout in seconds")
+    args = parser.parse_args()
+    main(
+        collection_name=args.collection,
+        vector_name=args.vector or None,
+        n_queries=args.queries,
+        limits=[int(v) for v in args.limits.split(",") if v.strip()],
+        timeout=args.timeout,
+    )
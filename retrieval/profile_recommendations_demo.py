@@ -152,7 +152,7 @@ fused_vector = fusion.create_fused_embedding(
 
 fused_results = qdrant.search(
     collection_name=COLLECTION_NAME,
-    query_vector=fused_vector.tolist(),
+    query_vector=("text", fused_vector.tolist()),
     limit=5,
     with_payload=True,
     with_vectors=False,
@@ -163,7 +163,7 @@ avg_vector = model.encode(interests).mean(axis=0).tolist() #type: ignore
 
 avg_results = qdrant.search(
     collection_name=COLLECTION_NAME,
-    query_vector=avg_vector,
+    query_vector=("text", avg_vector),
     limit=5,
     with_payload=True,
     with_vectors=False,
@@ -176,7 +176,7 @@ for tag in interests:
     vector = model.encode(tag).tolist() #type: ignore
     results = qdrant.search(
         collection_name=COLLECTION_NAME,
-        query_vector=vector,
+        query_vector=("text", vector),
         limit=5,
         with_payload=True,
         with_vectors=False,
@@ -70,7 +70,7 @@ while True:
 
     results = qdrant.search(
         collection_name=COLLECTION_NAME,
-        query_vector=query_vector,
+        query_vector=("text", query_vector),
         limit=3,
         with_payload=True,
         with_vectors=False,
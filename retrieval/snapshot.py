@@ -0,0 +1,231 @@
+"""
+On-disk snapshot of the bill embedding collection.
+
+  python retrieval/snapshot.py export --out data/bill_snapshot [--dtype float16]
+  python retrieval/snapshot.py info data/bill_snapshot
+  python retrieval/snapshot.py import data/bill_snapshot [--collection NAME]
+
+Layout of a snapshot directory:
+  manifest.json   collection, source version, model, dtype, vector names, count, dim
+  bill_ids.npy    int64 point ids, row-aligned with the vector files
+  <name>.npy      float32 or float16 (count, dim) unit-normalized vectors per named vector
+  payloads.json   list of point payloads, row-aligned
+
+The .npy files are plain NumPy arrays, so np.load(..., mmap_mode="r")
+opens them in milliseconds without reading them into RAM; float16 halves
+the size at a negligible cost in cosine precision. Exports are written to
+a temporary directory and swapped into place, so readers (the API's
+LocalIndex) never see a half-written snapshot.
+
+app/services/local_index.py loads it as the NumPy search backend and as a
+fallback when Qdrant is down; experiments in retrieval/ can use
+load_snapshot directly.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+# --- Config ---
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+COLLECTION_NAME = "bill_text_embeddings"
+DEFAULT_VECTOR = "default"  # file name used for an unnamed vector
+SNAPSHOT_FORMAT = 2  # 2 added model / dtype / distance; readers accept 1
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+DTYPES = ("float32", "float16")
+UPSERT_BATCH = 256
+
+
+def resolve_collection(qdrant, name):
+    """Concrete collection behind an alias (or ``name`` itself)."""
+    for item in qdrant.get_aliases().aliases:
+        if item.alias_name == name:
+            return item.collection_name
+    return name
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _replace_dir(tmp_dir, out_dir):
+    """Swap ``tmp_dir`` into ``out_dir``; open memory maps keep the old files."""
+    old_dir = None
+    if os.path.exists(out_dir):
+        old_dir = f"{out_dir}.old-{os.getpid()}"
+        os.rename(out_dir, old_dir)
+    os.rename(tmp_dir, out_dir)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def export_snapshot(qdrant, collection_name, out_dir, dtype="float32"):
+    source = resolve_collection(qdrant, collection_name)
+    ids, payloads, vectors = [], [], {}
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=source,
+            limit=1000,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        for point in points:
+            named = point.vector if isinstance(point.vector, dict) else {DEFAULT_VECTOR: point.vector}
+            ids.append(int(point.id))
+            payloads.append(point.payload or {})
+            for name, vector in named.items():
+                vectors.setdefault(name, []).append(vector)
+        if offset is None:
+            break
+
+    out_dir = os.path.normpath(out_dir)
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+    try:
+        manifest = _write_snapshot(tmp_dir, collection_name, source, ids, vectors, payloads, dtype)
+        _replace_dir(tmp_dir, out_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _write_snapshot(tmp_dir, collection_name, source, ids, vectors, payloads, dtype):
+    np.save(os.path.join(tmp_dir, "bill_ids.npy"), np.asarray(ids, dtype=np.int64))
+    files = {}
+    dim = 0
+    for name, rows in vectors.items():
+        matrix = _normalize(np.asarray(rows, dtype=np.float32)).astype(dtype)
+        dim = matrix.shape[1]
+        files[name] = f"{name}.npy"
+        np.save(os.path.join(tmp_dir, files[name]), matrix)
+    with open(os.path.join(tmp_dir, "payloads.json"), "w", encoding="utf-8") as f:
+        json.dump(payloads, f)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "collection": collection_name,
+        "source": source,
+        "created": datetime.now().isoformat(timespec="milliseconds"),
+        "model": MODEL_NAME,
+        "distance": "cosine",
+        "normalized": True,
+        "dtype": dtype,
+        "count": len(ids),
+        "dim": dim,
+        "vectors": files,
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(path):
+    with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_snapshot(path, mmap=True):
+    """
+    Return (manifest, ids, {name: matrix}, payloads) for a snapshot directory.
+    With ``mmap`` the matrices are read-only memory maps: loading is instant
+    and pages are shared between worker processes.
+    """
+    manifest = read_manifest(path)
+    ids = np.load(os.path.join(path, "bill_ids.npy"))
+    vectors = {
+        name: np.load(os.path.join(path, filename), mmap_mode="r" if mmap else None)
+        for name, filename in manifest["vectors"].items()
+    }
+    with open(os.path.join(path, "payloads.json"), encoding="utf-8") as f:
+        payloads = json.load(f)
+    return manifest, ids, vectors, payloads
+
+
+def import_snapshot(qdrant, path, collection_name):
+    """Create ``collection_name`` from a snapshot (vectors are upserted as float32)."""
+    manifest, ids, vectors, payloads = load_snapshot(path)
+    if qdrant.collection_exists(collection_name):
+        raise SystemExit(f"Collection {collection_name} already exists")
+    named = list(vectors) != [DEFAULT_VECTOR]
+    params = VectorParams(size=manifest["dim"], distance=Distance.COSINE)
+    qdrant.create_collection(
+        collection_name=collection_name,
+        vectors_config={name: params for name in vectors} if named else params,
+    )
+    for start in range(0, len(ids), UPSERT_BATCH):
+        end = start + UPSERT_BATCH
+        blocks = {name: np.asarray(matrix[start:end], dtype=np.float32) for name, matrix in vectors.items()}
+        points = []
+        for i, point_id in enumerate(ids[start:end]):
+            if named:
+                vector = {name: block[i].tolist() for name, block in blocks.items()}
+            else:
+                vector = blocks[DEFAULT_VECTOR][i].tolist()
+            points.append(PointStruct(id=int(point_id), vector=vector, payload=payloads[start + i]))
+        qdrant.upsert(collection_name=collection_name, points=points)
+    return manifest
+
+
+def print_info(path):
+    start = time.perf_counter()
+    manifest, ids, vectors, payloads = load_snapshot(path)
+    load_ms = (time.perf_counter() - start) * 1000
+    print(json.dumps(manifest, indent=2))
+    total = 0
+    for filename in sorted(os.listdir(path)):
+        size = os.path.getsize(os.path.join(path, filename))
+        total += size
+        print(f"  {filename:<20}{size / 1e6:>10.2f} MB")
+    print(f"  {'total':<20}{total / 1e6:>10.2f} MB")
+    print(f"Loaded {len(ids)} ids, {len(payloads)} payloads, "
+          f"{', '.join(f'{n} {m.dtype} {m.shape}' for n, m in vectors.items())} in {load_ms:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export, inspect and import bill embedding snapshots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Write a snapshot of a collection")
+    export.add_argument("--collection", default=COLLECTION_NAME)
+    export.add_argument("--out", required=True, help="Snapshot directory")
+    export.add_argument("--dtype", choices=DTYPES, default="float32",
+                        help="On-disk vector precision (float16 halves the size)")
+    info = sub.add_parser("info", help="Show a snapshot's manifest, file sizes and load time")
+    info.add_argument("path")
+    load = sub.add_parser("import", help="Create a Qdrant collection from a snapshot")
+    load.add_argument("path")
+    load.add_argument("--collection", default=None,
+                      help="New collection name (default: <collection>_v<timestamp>)")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        print_info(args.path)
+        return
+
+    qdrant = QdrantClient(QDRANT_HOST, port=6333)
+    start = time.perf_counter()
+    if args.command == "export":
+        manifest = export_snapshot(qdrant, args.collection, args.out, dtype=args.dtype)
+        print(f"Exported {manifest['count']} points ({', '.join(manifest['vectors'])}, {args.dtype}) "
+              f"from {manifest['source']} to {args.out} in {time.perf_counter() - start:.1f}s")
+    else:
+        manifest = read_manifest(args.path)
+        collection_name = args.collection or f"{manifest['collection']}_v{time.strftime('%Y%m%d%H%M%S')}"
+        import_snapshot(qdrant, args.path, collection_name)
+        print(f"Imported {manifest['count']} points into {collection_name} "
+              f"in {time.perf_counter() - start:.1f}s")
+        print(f"Point the {manifest['collection']} alias at it to serve it from the API.")
+
+
+if __name__ == "__main__":
+    main()
@@ -92,7 +92,7 @@ def fused_embedding_search(interests: List[str], demographics: Dict, limit: int
     
     results = qdrant.search(
         collection_name=COLLECTION_NAME,
-        query_vector=fused_vector.tolist(),
+        query_vector=("text", fused_vector.tolist()),
         limit=limit * 2,  # Get more for comparison
         with_payload=True,
         with_vectors=False,
@@ -110,7 +110,7 @@ def interests_only_search(interests: List[str], limit: int = 5):
     
     results = qdrant.search(
         collection_name=COLLECTION_NAME,
-        query_vector=interest_vector,
+        query_vector=("text", interest_vector),
         limit=limit * 2,
         with_payload=True,
         with_vectors=False,
@@ -130,7 +130,7 @@ def demographics_only_search(demographics: Dict, limit: int = 5):
     
     results = qdrant.search(
         collection_name=COLLECTION_NAME,
-        query_vector=demo_vector,
+        query_vector=("text", demo_vector),
         limit=limit * 2,
         with_payload=True,
         with_vectors=False,
@@ -0,0 +1,121 @@
+"""
+Run metrics for the scraper.
+
+Every timed stage, retry and rate-limit wait is appended to a JSON-lines
+file (one object per line, ``{"ts": ..., "event": ..., ...}``) when a path
+is given, and aggregated for the summary table printed at the end of a run.
+"""
+
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+STAGES = ("list fetch", "detail fetch", "html fetch", "parse", "parse wait", "db lookup", "db write")
+
+
+class RunMetrics:
+    def __init__(self, jsonl_path: str | None = None):
+        self.seconds: dict[str, float] = defaultdict(float)
+        self.calls: dict[str, int] = defaultdict(int)
+        self.bytes: dict[str, int] = defaultdict(int)
+        self.retries = 0
+        self.rate_limit_waits = 0
+        self.rate_limit_seconds = 0.0
+        self.queue_max = 0
+        self.queue_total = 0
+        self.queue_samples = 0
+        self._current: list[str] = []
+        # Line-buffered: each record reaches disk as it is written, so a run
+        # that crashes hours in still leaves a complete log up to that point.
+        self._fh = open(jsonl_path, "a", encoding="utf-8", buffering=1) if jsonl_path else None
+        self._start = time.perf_counter()
+
+    # ── recording ────────────────────────────────────────────────────────
+    def emit(self, event: str, **fields):
+        if self._fh is None:
+            return
+        record = {"ts": round(time.time(), 3), "event": event, **fields}
+        self._fh.write(json.dumps(record, default=str) + "\n")
+
+    @contextmanager
+    def stage(self, name: str, **fields):
+        """Time a block; bytes recorded inside it are attributed to ``name``."""
+        self._current.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._current.pop()
+            self.add(name, time.perf_counter() - start, **fields)
+
+    def add(self, name: str, seconds: float, **fields):
+        self.seconds[name] += seconds
+        self.calls[name] += 1
+        self.emit("stage", stage=name, seconds=round(seconds, 4), **fields)
+
+    def add_bytes(self, nbytes: int):
+        stage = self._current[-1] if self._current else "other"
+        self.bytes[stage] += nbytes
+
+    def retry(self, url: str, reason: str):
+        self.retries += 1
+        self.emit("retry", url=url, reason=reason)
+
+    def rate_limited(self, url: str, wait: float):
+        self.rate_limit_waits += 1
+        self.rate_limit_seconds += wait
+        self.emit("rate_limit", url=url, wait=wait)
+
+    def sample_queue(self, depth: int):
+        self.queue_max = max(self.queue_max, depth)
+        self.queue_total += depth
+        self.queue_samples += 1
+
+    # ── reporting ────────────────────────────────────────────────────────
+    def summary(self) -> dict:
+        return {
+            "wall_seconds": round(time.perf_counter() - self._start, 3),
+            "stages": {
+                name: {
+                    "seconds": round(self.seconds[name], 3),
+                    "calls": self.calls[name],
+                    "bytes": self.bytes.get(name, 0),
+                }
+                for name in self.seconds
+            },
+            "bytes_total": sum(self.bytes.values()),
+            "retries": self.retries,
+            "rate_limit_waits": self.rate_limit_waits,
+            "rate_limit_seconds": round(self.rate_limit_seconds, 3),
+            "parse_queue_max": self.queue_max,
+            "parse_queue_avg": round(self.queue_total / self.queue_samples, 2)
+            if self.queue_samples else 0.0,
+        }
+
+    def report(self, **counts):
+        summary = self.summary()
+        self.emit("summary", **summary, **counts)
+
+        wall = summary["wall_seconds"]
+        order = [s for s in STAGES if s in self.seconds] + \
+                [s for s in self.seconds if s not in STAGES]
+        print(f"\n⏱  Run metrics (wall {wall:.1f}s)")
+        print(f"  {'stage':<14} {'total':>9} {'share':>6} {'calls':>7} {'avg':>10} {'MB':>8}")
+        for name in order:
+            secs = self.seconds[name]
+            calls = self.calls[name]
+            avg_ms = secs / calls * 1000 if calls else 0.0
+            share = secs / wall * 100 if wall else 0.0
+            mb = self.bytes.get(name, 0) / 1e6
+            print(f"  {name:<14} {secs:8.1f}s {share:5.1f}% {calls:7d} {avg_ms:7.1f} ms {mb:8.2f}")
+        print(f"  transferred    {summary['bytes_total'] / 1e6:.2f} MB")
+        print(f"  retries        {self.retries}")
+        print(f"  rate limits    {self.rate_limit_waits} waits, {self.rate_limit_seconds:.0f}s total")
+        print(f"  parse queue    max {self.queue_max}, avg {summary['parse_queue_avg']:.1f}")
+        print("  (parse is summed worker time and overlaps the other stages)")
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
@@ -0,0 +1,81 @@
+"""
+Local store of the raw DocumentViewer HTML the scraper downloads.
+
+Pages are saved as zstd-compressed blobs keyed by docid, language and a
+content hash:
+
+    <root>/<docid>/<lang>-<sha256[:16]>.html.zst
+
+Identical re-downloads map to the same file and are not written twice, so
+amended versions of a bill sit next to each other. Re-extraction
+(scraping/reextract.py) reads from here instead of hitting parl.ca again.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+import zstandard
+
+COMPRESSION_LEVEL = 10
+SUFFIX = ".html.zst"
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()[:16]
+
+
+class RawDocumentStore:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, doc_id: int, lang: str, digest: str) -> Path:
+        return self.root / str(doc_id) / f"{lang}-{digest}{SUFFIX}"
+
+    def put(self, doc_id: int, lang: str, html: str) -> str:
+        """Store one page and return its content hash."""
+        digest = content_hash(html)
+        path = self._path(doc_id, lang, digest)
+        if path.exists():
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        blob = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).compress(html.encode("utf-8"))
+        # Write-then-rename so a crashed run never leaves a truncated blob.
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(blob)
+        tmp.replace(path)
+        return digest
+
+    def get(self, doc_id: int, lang: str, digest: str | None = None) -> str | None:
+        """
+        Return a stored page; the most recently written one if no hash is
+        given. The scraper records the hash each billtext row was extracted
+        from (raw_hash_en / raw_hash_fr), so prefer passing that.
+        """
+        if digest:
+            path = self._path(doc_id, lang, digest)
+            if not path.exists():
+                return None
+        else:
+            candidates = sorted(
+                (self.root / str(doc_id)).glob(f"{lang}-*{SUFFIX}"),
+                key=lambda p: p.stat().st_mtime,
+            )
+            if not candidates:
+                return None
+            path = candidates[-1]
+        data = zstandard.ZstdDecompressor().decompress(path.read_bytes())
+        return data.decode("utf-8")
+
+    def doc_ids(self) -> list[int]:
+        if not self.root.exists():
+            return []
+        return sorted(int(p.name) for p in self.root.iterdir() if p.is_dir() and p.name.isdigit())
+
+    def stats(self) -> dict:
+        files = list(self.root.glob(f"*/*{SUFFIX}")) if self.root.exists() else []
+        return {
+            "documents": len(self.doc_ids()),
+            "blobs": len(files),
+            "bytes": sum(p.stat().st_size for p in files),
+        }
@@ -0,0 +1,116 @@
+"""
+Rebuild text_en / text_fr / summary_en from the raw document store without
+re-scraping parl.ca. Useful after changing the extraction logic in
+scraping/scraping.py.
+
+Each row is re-extracted from the blobs named by its raw_hash_en /
+raw_hash_fr columns, i.e. the HTML its current text came from. Rows
+without recorded hashes fall back to the newest stored blob, and the hashes
+of the blobs used are written back. Fill the store for bills scraped before
+it existed with scraping.py --raw-store DIR --raw-store-backfill.
+
+Usage:
+    python scraping/reextract.py --raw-store data/raw              # every stored doc
+    python scraping/reextract.py --raw-store data/raw --doc-id 13124466
+    python scraping/reextract.py --raw-store data/raw --dry-run
+"""
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import psycopg2
+
+sys.path.insert(0, ".")
+from app.config.settings import DB_CFG
+from raw_store import RawDocumentStore, content_hash
+from scraping import DEFAULT_PARSE_WORKERS, ensure_raw_hash_columns, parse_documents, record_raw_hashes
+
+
+def recorded_hashes(cur, doc_ids: list[int]) -> dict[int, dict]:
+    cur.execute(
+        "SELECT docid, raw_hash_en, raw_hash_fr FROM bills_billtext WHERE docid = ANY(%s)",
+        (doc_ids,),
+    )
+    return {row[0]: {"en": row[1], "fr": row[2]} for row in cur.fetchall() if row[1] or row[2]}
+
+
+def load_and_parse(raw_store_dir: str, doc_id: int, hashes: dict | None):
+    """Parse the recorded blobs (newest ones if none are recorded); returns the hashes used too."""
+    store = RawDocumentStore(raw_store_dir)
+    pages = {}
+    for lang in ("en", "fr"):
+        digest = hashes.get(lang) if hashes else None
+        if hashes and not digest:
+            pages[lang] = None
+            continue
+        pages[lang] = store.get(doc_id, lang, digest)
+    if not pages["en"] and not pages["fr"]:
+        return doc_id, None, None
+    used = {lang: content_hash(html) if html else None for lang, html in pages.items()}
+    return doc_id, parse_documents(pages["en"], pages["fr"]), used
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Re-extract bill text from stored HTML"
+    )
+    parser.add_argument("--raw-store", required=True, help="Raw document store directory")
+    parser.add_argument("--doc-id", type=int, action="append", help="Only these doc ids")
+    parser.add_argument("--workers", type=int, default=DEFAULT_PARSE_WORKERS)
+    parser.add_argument("--dry-run", action="store_true", help="Parse but don't write")
+    args = parser.parse_args()
+
+    store = RawDocumentStore(args.raw_store)
+    doc_ids = args.doc_id or store.doc_ids()
+    print(f"🔁 Re-extracting {len(doc_ids)} document(s) from {args.raw_store}")
+
+    conn = psycopg2.connect(**DB_CFG)
+    cur = conn.cursor()
+    ensure_raw_hash_columns(cur)
+    conn.commit()
+    hashes = recorded_hashes(cur, doc_ids)
+    print(f"   {len(hashes)} with recorded raw hashes, {len(doc_ids) - len(hashes)} using the newest blob")
+    updated = 0
+    missing = 0
+
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        results = pool.map(
+            load_and_parse,
+            [args.raw_store] * len(doc_ids),
+            doc_ids,
+            [hashes.get(doc_id) for doc_id in doc_ids],
+        )
+        for doc_id, parsed, used in results:
+            if parsed is None:
+                print(f"  ⚠  No stored HTML for doc {doc_id}")
+                missing += 1
+                continue
+            text_en, text_fr, summary_en, _ = parsed
+            if args.dry_run:
+                print(f"  doc {doc_id}: {len(text_en)} chars en, {len(text_fr)} chars fr")
+                continue
+            for table in ("bills_billtext", "bills_billtext_copy"):
+                cur.execute(
+                    f"""
+                    UPDATE {table}
+                       SET text_en    = %s,
+                           text_fr    = %s,
+                           summary_en = %s
+                     WHERE docid = %s
+                    """,
+                    (text_en, text_fr, summary_en, doc_id),
+                )
+            record_raw_hashes(cur, doc_id, used)
+            conn.commit()
+            updated += 1
+
+    cur.close()
+    conn.close()
+
+    print(f"\n✅ Done — updated: {updated}, missing: {missing}")
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,12 +7,23 @@ Usage:
     python scraping/scraping.py --session 45-1         # scrape a specific session
     python scraping/scraping.py --since 2025-10-01     # scrape bills introduced on or after a date
     python scraping/scraping.py --session 44-1 --limit 5  # scrape with a cap
+    python scraping/scraping.py --parse-workers 4      # parse HTML in 4 processes
+    python scraping/scraping.py --raw-store data/raw   # keep compressed source HTML
+    python scraping/scraping.py --raw-store data/raw --raw-store-backfill  # also fetch HTML for stored bills
+    python scraping/scraping.py --metrics-file run.jsonl  # per-stage metrics as JSON lines
+
+Network fetches run on the main thread, HTML parsing runs in a process pool
+and DB writes happen on the main thread as parsed pages come back, so the
+three stages overlap instead of running back to back.
 """
 
 import argparse
+import os
 import re
 import sys
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 
 import psycopg2
@@ -21,6 +32,8 @@ from bs4 import BeautifulSoup
 
 sys.path.insert(0, ".")
 from app.config.settings import DB_CFG
+from metrics import RunMetrics
+from raw_store import RawDocumentStore, content_hash
 
 # ── constants ────────────────────────────────────────────────────────────────
 API_BASE = "https://api.openparliament.ca"
@@ -34,16 +47,24 @@ HEADERS = {
 
 REQUEST_DELAY = 0.5  # seconds between API calls to respect rate limits
 
+DEFAULT_PARSE_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+MAX_PENDING_PER_WORKER = 2  # parsed pages allowed to queue up per worker
+
 
 # ── API helpers ──────────────────────────────────────────────────────────────
-def fetch_json(url: str, params: dict | None = None) -> dict:
+def fetch_json(url: str, params: dict | None = None, metrics: RunMetrics | None = None) -> dict:
     """GET a JSON resource, retrying once on 429."""
     full_url = url if url.startswith("http") else f"{API_BASE}{url}"
     for attempt in range(3):
         resp = requests.get(full_url, headers=HEADERS, params=params, timeout=30)
+        if metrics:
+            metrics.add_bytes(len(resp.content))
         if resp.status_code == 429:
             wait = int(resp.headers.get("Retry-After", 5))
             print(f"  ⏳ Rate-limited, waiting {wait}s …")
+            if metrics:
+                metrics.rate_limited(full_url, wait)
+                metrics.retry(full_url, "429")
             time.sleep(wait)
             continue
         resp.raise_for_status()
@@ -51,7 +72,7 @@ def fetch_json(url: str, params: dict | None = None) -> dict:
     raise RuntimeError(f"Failed to fetch {full_url} after retries")
 
 
-def iter_bills(session: str | None = None):
+def iter_bills(session: str | None = None, metrics: RunMetrics | None = None):
     """Yield every bill object from the paginated /bills/ endpoint."""
     params: dict = {}
     if session:
@@ -59,27 +80,29 @@ def iter_bills(session: str | None = None):
 
     url = "/bills/"
     while url:
-        data = fetch_json(url, params)
+        data = fetch_json(url, params, metrics)
         yield from data.get("objects", [])
         url = data.get("pagination", {}).get("next_url")
         params = {}  # next_url already contains query params
         time.sleep(REQUEST_DELAY)
 
 
-def fetch_bill_detail(bill_url: str) -> dict:
+def fetch_bill_detail(bill_url: str, metrics: RunMetrics | None = None) -> dict:
     """Return the full detail dict for a single bill."""
     time.sleep(REQUEST_DELAY)
-    return fetch_json(bill_url)
+    return fetch_json(bill_url, metrics=metrics)
 
 
 # ── parl.ca scraping ────────────────────────────────────────────────────────
-def scrape_bill_page(doc_id: int, lang: str = "en") -> str | None:
+def scrape_bill_page(doc_id: int, lang: str = "en", metrics: RunMetrics | None = None) -> str | None:
     """Download the HTML for a bill from the parl.ca DocumentViewer."""
     url = f"{PARL_VIEWER}/{lang}/{doc_id}"
     try:
         resp = requests.get(url, timeout=60, headers={
             "User-Agent": "BillBoard-Capstone (contact: billboard@example.com)"
         })
+        if metrics:
+            metrics.add_bytes(len(resp.content))
         if resp.status_code != 200:
             print(f"  ⚠  DocumentViewer returned {resp.status_code} for {url}")
             return None
@@ -124,6 +147,31 @@ def extract_summary(html: str) -> str:
     return ""
 
 
+def parse_documents(
+    html_en: str | None,
+    html_fr: str | None,
+    doc_id: int | None = None,
+    raw_store_dir: str | None = None,
+) -> tuple[str, str, str, float]:
+    """
+    Process-pool entry point: extract text_en, text_fr and summary_en.
+    Also returns the seconds spent parsing so the parent can report it.
+
+    When ``raw_store_dir`` is set the source HTML is compressed into the raw
+    document store here too, keeping that work off the fetching thread.
+    """
+    start = time.perf_counter()
+    if raw_store_dir and doc_id:
+        store = RawDocumentStore(raw_store_dir)
+        for lang, html in (("en", html_en), ("fr", html_fr)):
+            if html:
+                store.put(doc_id, lang, html)
+    text_en = extract_text_from_html(html_en) if html_en else ""
+    text_fr = extract_text_from_html(html_fr) if html_fr else ""
+    summary_en = extract_summary(html_en) if html_en else ""
+    return text_en, text_fr, summary_en, time.perf_counter() - start
+
+
 def extract_doc_id(text_url: str | None) -> int | None:
     """Extract the numeric doc ID from a parl.ca DocumentViewer URL."""
     if not text_url:
@@ -133,11 +181,50 @@ def extract_doc_id(text_url: str | None) -> int | None:
 
 
 # ── DB helpers ───────────────────────────────────────────────────────────────
-def ensure_session(cur, session_id: str):
+class LookupCache:
+    """
+    In-memory copy of the keys the scraper checks for every bill: session
+    ids, legisinfo_id → bills_bill.id, and the docids already present in
+    both billtext tables. Loaded once per run so unchanged bills need no
+    DB round trips at all.
+    """
+
+    def __init__(self, cur, raw_hashes: bool = False):
+        self.raw_hashes = raw_hashes
+        self.reload(cur)
+
+    def reload(self, cur):
+        cur.execute("SELECT id FROM core_session")
+        self.sessions: set[str] = {row[0] for row in cur.fetchall()}
+        cur.execute("SELECT legisinfo_id, id FROM bills_bill WHERE legisinfo_id IS NOT NULL")
+        self.bill_ids: dict[int, int] = {row[0]: row[1] for row in cur.fetchall()}
+        cur.execute("SELECT bill_id, docid FROM bills_billtext_copy")
+        self.copy_keys: set[tuple[int, int]] = {(row[0], row[1]) for row in cur.fetchall()}
+        cur.execute("SELECT docid FROM bills_billtext WHERE docid IS NOT NULL")
+        self.main_docids: set[int] = {row[0] for row in cur.fetchall()}
+        # Docids whose text in bills_billtext is tied to a raw store blob.
+        self.raw_docids: set[int] = set()
+        if self.raw_hashes:
+            cur.execute("SELECT docid FROM bills_billtext WHERE docid IS NOT NULL AND raw_hash_en IS NOT NULL")
+            self.raw_docids = {row[0] for row in cur.fetchall()}
+
+    def has_text(self, bill_id: int, doc_id: int) -> bool:
+        return (bill_id, doc_id) in self.copy_keys and doc_id in self.main_docids
+
+    def add_text(self, bill_id: int, doc_id: int):
+        self.copy_keys.add((bill_id, doc_id))
+        self.main_docids.add(doc_id)
+
+
+def ensure_session(cur, session_id: str, cache: LookupCache | None = None):
     """Create a core_session row if it doesn't already exist."""
-    cur.execute("SELECT 1 FROM core_session WHERE id = %s", (session_id,))
-    if cur.fetchone():
-        return
+    if cache is not None:
+        if session_id in cache.sessions:
+            return
+    else:
+        cur.execute("SELECT 1 FROM core_session WHERE id = %s", (session_id,))
+        if cur.fetchone():
+            return
     # Parse "45-1" → parliament=45, sessnum=1
     parts = session_id.split("-")
     pnum = int(parts[0]) if parts[0].isdigit() else None
@@ -151,10 +238,12 @@ def ensure_session(cur, session_id: str):
         """,
         (session_id, name, datetime.now(timezone.utc).date(), pnum, snum),
     )
+    if cache is not None:
+        cache.sessions.add(session_id)
     print(f"  ✚ Created core_session '{session_id}'")
 
 
-def get_or_create_bill(cur, detail: dict) -> int | None:
+def get_or_create_bill(cur, detail: dict, cache: LookupCache | None = None) -> int | None:
     """
     Look up a bills_bill row by legisinfo_id. Create one if it doesn't exist.
     Returns the bills_bill.id.
@@ -163,10 +252,14 @@ def get_or_create_bill(cur, detail: dict) -> int | None:
     if not legisinfo_id:
         return None
 
-    cur.execute("SELECT id FROM bills_bill WHERE legisinfo_id = %s", (legisinfo_id,))
-    row = cur.fetchone()
-    if row:
-        return row[0]
+    if cache is not None:
+        if legisinfo_id in cache.bill_ids:
+            return cache.bill_ids[legisinfo_id]
+    else:
+        cur.execute("SELECT id FROM bills_bill WHERE legisinfo_id = %s", (legisinfo_id,))
+        row = cur.fetchone()
+        if row:
+            return row[0]
 
     # Need to insert a new bills_bill record
     name_en = (detail.get("name") or {}).get("en", "")
@@ -185,7 +278,7 @@ def get_or_create_bill(cur, detail: dict) -> int | None:
     text_docid = extract_doc_id(detail.get("text_url"))
 
     # Ensure the session FK target exists
-    ensure_session(cur, session_id)
+    ensure_session(cur, session_id, cache)
 
     status_date = introduced  # use introduced date as initial status_date
 
@@ -213,6 +306,8 @@ def get_or_create_bill(cur, detail: dict) -> int | None:
         ),
     )
     new_id = cur.fetchone()[0]
+    if cache is not None:
+        cache.bill_ids[legisinfo_id] = new_id
     print(f"  ✚ Created bills_bill id={new_id} for {session_id}/{number}")
     return new_id
 
@@ -338,6 +433,70 @@ def upsert_billtext_main(
         print(f"    ✚ Inserted billtext (main) id={new_id}")
 
 
+def ensure_raw_hash_columns(cur):
+    """raw_hash_en / raw_hash_fr: raw store content hashes of the HTML each row was extracted from."""
+    for table in ("bills_billtext", "bills_billtext_copy"):
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS raw_hash_en TEXT")
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS raw_hash_fr TEXT")
+
+
+def record_raw_hashes(cur, doc_id: int, hashes: dict):
+    for table in ("bills_billtext", "bills_billtext_copy"):
+        cur.execute(
+            f"UPDATE {table} SET raw_hash_en = %s, raw_hash_fr = %s WHERE docid = %s",
+            (hashes.get("en"), hashes.get("fr"), doc_id),
+        )
+
+
+# ── pipeline ─────────────────────────────────────────────────────────────────
+def write_parsed(conn, cur, job: dict, parsed: tuple, metrics: RunMetrics, counts: dict,
+                 cache: LookupCache):
+    """Upsert one parsed bill into both billtext tables and commit."""
+    text_en, text_fr, summary_en, parse_secs = parsed
+    metrics.add("parse", parse_secs, bill=job["label"])
+    try:
+        with metrics.stage("db write", bill=job["label"]):
+            upsert_billtext(cur, job["bill_id"], job["doc_id"], job["created"],
+                            text_en, text_fr, summary_en)
+            upsert_billtext_main(cur, job["bill_id"], job["doc_id"], job["created"],
+                                 text_en, text_fr, summary_en)
+            if job.get("raw_hashes"):
+                record_raw_hashes(cur, job["doc_id"], job["raw_hashes"])
+            conn.commit()
+    except Exception as exc:
+        print(f"  ⚠  DB error upserting {job['label']}: {exc}")
+        conn.rollback()
+        counts["errors"] += 1
+        return
+    cache.add_text(job["bill_id"], job["doc_id"])
+    if job.get("raw_hashes"):
+        cache.raw_docids.add(job["doc_id"])
+    counts["processed"] += 1
+
+
+def drain_parsed(conn, cur, pending: deque, metrics: RunMetrics, counts: dict,
+                 cache: LookupCache, keep: int | None = None):
+    """
+    Write finished parse jobs in submission order.
+
+    With ``keep=None`` only jobs that are already done are written. Otherwise
+    block on the oldest job until at most ``keep`` jobs remain in flight.
+    """
+    while pending:
+        future, job = pending[0]
+        if not future.done() and (keep is None or len(pending) <= keep):
+            break
+        pending.popleft()
+        try:
+            with metrics.stage("parse wait", bill=job["label"]):
+                parsed = future.result()
+        except Exception as exc:
+            print(f"  ⚠  Parse error for {job['label']}: {exc}")
+            counts["errors"] += 1
+            continue
+        write_parsed(conn, cur, job, parsed, metrics, counts, cache)
+
+
 # ── main ─────────────────────────────────────────────────────────────────────
 def main():
     parser = argparse.ArgumentParser(
@@ -352,7 +511,27 @@ def main():
         "--limit", type=int, default=0,
         help="Max number of bills to process (0 = all)"
     )
+    parser.add_argument(
+        "--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS,
+        help=f"Processes used for HTML parsing (default: {DEFAULT_PARSE_WORKERS})"
+    )
+    parser.add_argument(
+        "--raw-store", default=None,
+        help="Directory for zstd-compressed source HTML (disabled if omitted)"
+    )
+    parser.add_argument(
+        "--raw-store-backfill", action="store_true",
+        help="Also re-fetch bills already in the DB whose text has no raw store blob (needs --raw-store)"
+    )
+    parser.add_argument(
+        "--metrics-file", default=None,
+        help="Append per-stage timings, retries and rate-limit waits here as JSON lines"
+    )
     args = parser.parse_args()
+    if args.raw_store_backfill and not args.raw_store:
+        parser.error("--raw-store-backfill needs --raw-store")
+    parse_workers = max(1, args.parse_workers)
+    max_pending = parse_workers * MAX_PENDING_PER_WORKER
 
     since_date = (
         datetime.strptime(args.since, "%Y-%m-%d").date() if args.since else None
@@ -371,11 +550,18 @@ def main():
             END IF;
         END $$;
     """)
+    if args.raw_store:
+        ensure_raw_hash_columns(cur)
+    conn.commit()
+
+    cache = LookupCache(cur, raw_hashes=bool(args.raw_store))
     conn.commit()
+    print(f"📦 Preloaded {len(cache.bill_ids)} bills, {len(cache.main_docids)} bill texts, "
+          f"{len(cache.sessions)} sessions")
 
-    processed = 0
-    skipped = 0
-    errors = 0
+    counts = {"processed": 0, "skipped": 0, "errors": 0}
+    metrics = RunMetrics(args.metrics_file)
+    pending: deque = deque()
 
     filters = []
     if args.session:
@@ -383,111 +569,137 @@ def main():
     if since_date:
         filters.append(f"since {since_date}")
     filter_str = f" ({', '.join(filters)})" if filters else ""
-    print(f"🔍 Fetching bills from Open Parliament API{filter_str} …\n")
+    print(f"🔍 Fetching bills from Open Parliament API{filter_str} …")
+    print(f"   parsing with {parse_workers} worker process(es)\n")
 
-    for bill_summary in iter_bills(session=args.session):
-        if args.limit and processed >= args.limit:
-            break
-
-        bill_url = bill_summary.get("url")
-        number = bill_summary.get("number", "?")
-        session = bill_summary.get("session", "?")
-        label = f"{session}/{number}"
-
-        # ── date filter ──────────────────────────────────────────────────
-        if since_date:
-            introduced_str = bill_summary.get("introduced")
-            if introduced_str:
-                intro = datetime.strptime(introduced_str, "%Y-%m-%d").date()
-                if intro < since_date:
-                    continue
-            else:
-                # No introduced date available — skip to be safe
+    pool = ProcessPoolExecutor(max_workers=parse_workers)
+    bills = iter_bills(session=args.session, metrics=metrics)
+    try:
+        while True:
+            # In-flight parses count towards --limit so we don't overshoot it,
+            # but only successful writes satisfy it: once the limit is reached,
+            # wait for the in-flight jobs and carry on if any of them failed.
+            if args.limit and counts["processed"] + len(pending) >= args.limit:
+                if not pending:
+                    break
+                drain_parsed(conn, cur, pending, metrics, counts, cache, keep=0)
                 continue
 
-        print(f"[{processed + 1}] {label}")
-
-        # ── fetch detail ─────────────────────────────────────────────────
-        try:
-            detail = fetch_bill_detail(bill_url)
-        except Exception as exc:
-            print(f"  ⚠  Could not fetch detail for {label}: {exc}")
-            errors += 1
-            continue
-
-        # ── extract doc_id from text_url ─────────────────────────────────
-        text_url = detail.get("text_url")
-        doc_id = extract_doc_id(text_url)
-        if not doc_id:
-            print(f"  ⚠  No text_url / doc ID for {label}, skipping")
-            skipped += 1
-            continue
+            with metrics.stage("list fetch"):
+                bill_summary = next(bills, None)
+            if bill_summary is None:
+                break
+
+            bill_url = bill_summary.get("url")
+            number = bill_summary.get("number", "?")
+            session = bill_summary.get("session", "?")
+            label = f"{session}/{number}"
+
+            # ── date filter ──────────────────────────────────────────────
+            if since_date:
+                introduced_str = bill_summary.get("introduced")
+                if introduced_str:
+                    intro = datetime.strptime(introduced_str, "%Y-%m-%d").date()
+                    if intro < since_date:
+                        continue
+                else:
+                    # No introduced date available — skip to be safe
+                    continue
 
-        # ── look up or create bills_bill record ──────────────────────────
-        try:
-            bill_id = get_or_create_bill(cur, detail)
-        except Exception as exc:
-            print(f"  ⚠  DB error looking up bill for {label}: {exc}")
-            conn.rollback()
-            errors += 1
-            continue
+            print(f"[{counts['processed'] + len(pending) + 1}] {label}")
 
-        if not bill_id:
-            print(f"  ⚠  No legisinfo_id for {label}, skipping")
-            skipped += 1
-            continue
+            # ── fetch detail ─────────────────────────────────────────────
+            try:
+                with metrics.stage("detail fetch", bill=label):
+                    detail = fetch_bill_detail(bill_url, metrics)
+            except Exception as exc:
+                print(f"  ⚠  Could not fetch detail for {label}: {exc}")
+                counts["errors"] += 1
+                continue
 
-        # ── skip if already present in both tables ────────────────────
-        cur.execute(
-            "SELECT 1 FROM bills_billtext_copy WHERE bill_id = %s AND docid = %s",
-            (bill_id, doc_id),
-        )
-        in_copy = cur.fetchone()
-        cur.execute(
-            "SELECT 1 FROM bills_billtext WHERE docid = %s",
-            (doc_id,),
-        )
-        in_main = cur.fetchone()
-        if in_copy and in_main:
-            print(f"  ⏩ Already exists in both tables, skipping")
-            skipped += 1
-            processed += 1
-            continue
+            # ── extract doc_id from text_url ─────────────────────────────
+            text_url = detail.get("text_url")
+            doc_id = extract_doc_id(text_url)
+            if not doc_id:
+                print(f"  ⚠  No text_url / doc ID for {label}, skipping")
+                counts["skipped"] += 1
+                continue
 
-        # ── scrape bill text from parl.ca ────────────────────────────────
-        print(f"  📄 Scraping doc {doc_id} …")
-        html_en = scrape_bill_page(doc_id, lang="en")
-        time.sleep(REQUEST_DELAY)
-        html_fr = scrape_bill_page(doc_id, lang="fr")
+            # ── look up or create bills_bill record ──────────────────────
+            try:
+                with metrics.stage("db lookup", bill=label):
+                    bill_id = get_or_create_bill(cur, detail, cache)
+                    # Commit now: later writes for in-flight bills share this
+                    # connection, and a rollback there must not drop this row.
+                    conn.commit()
+            except Exception as exc:
+                print(f"  ⚠  DB error looking up bill for {label}: {exc}")
+                conn.rollback()
+                # The cache may now hold ids from the rolled-back insert.
+                cache.reload(cur)
+                counts["errors"] += 1
+                continue
 
-        text_en = extract_text_from_html(html_en) if html_en else ""
-        text_fr = extract_text_from_html(html_fr) if html_fr else ""
-        summary_en = extract_summary(html_en) if html_en else ""
+            if not bill_id:
+                print(f"  ⚠  No legisinfo_id for {label}, skipping")
+                counts["skipped"] += 1
+                continue
 
-        introduced = detail.get("introduced")
-        created = (
-            datetime.fromisoformat(introduced).replace(tzinfo=timezone.utc)
-            if introduced
-            else datetime.now(timezone.utc)
-        )
+            # ── skip if already present in both tables ────────────────
+            # (unless backfilling the raw store for a docid it has no blob for)
+            backfill = args.raw_store_backfill and doc_id not in cache.raw_docids
+            if cache.has_text(bill_id, doc_id) and not backfill:
+                print(f"  ⏩ Already exists in both tables, skipping")
+                counts["skipped"] += 1
+                counts["processed"] += 1
+                continue
 
-        # ── upsert into both tables ─────────────────────────────────────
-        try:
-            upsert_billtext(cur, bill_id, doc_id, created, text_en, text_fr, summary_en)
-            upsert_billtext_main(cur, bill_id, doc_id, created, text_en, text_fr, summary_en)
-            conn.commit()
-        except Exception as exc:
-            print(f"  ⚠  DB error upserting {label}: {exc}")
-            conn.rollback()
-            errors += 1
-            continue
+            # ── scrape bill text from parl.ca ────────────────────────────
+            print(f"  📄 Scraping doc {doc_id} …")
+            with metrics.stage("html fetch", bill=label):
+                html_en = scrape_bill_page(doc_id, lang="en", metrics=metrics)
+                time.sleep(REQUEST_DELAY)
+                html_fr = scrape_bill_page(doc_id, lang="fr", metrics=metrics)
+
+            introduced = detail.get("introduced")
+            created = (
+                datetime.fromisoformat(introduced).replace(tzinfo=timezone.utc)
+                if introduced
+                else datetime.now(timezone.utc)
+            )
 
-        processed += 1
+            # ── hand parsing to the pool, write whatever is ready ────────
+            job = {"label": label, "bill_id": bill_id, "doc_id": doc_id, "created": created}
+            if args.raw_store:
+                # Same digests parse_documents stores the blobs under.
+                job["raw_hashes"] = {
+                    lang: content_hash(html) if html else None
+                    for lang, html in (("en", html_en), ("fr", html_fr))
+                }
+            future = pool.submit(parse_documents, html_en, html_fr, doc_id, args.raw_store)
+            pending.append((future, job))
+            metrics.sample_queue(len(pending))
+            drain_parsed(conn, cur, pending, metrics, counts, cache,
+                         keep=max_pending if len(pending) > max_pending else None)
+
+        drain_parsed(conn, cur, pending, metrics, counts, cache, keep=0)
+    finally:
+        pool.shutdown(cancel_futures=True)
+        # Report even when the run dies: that is the run worth diagnosing.
+        metrics.report(**counts)
+        metrics.close()
 
     cur.close()
     conn.close()
 
-    print(f"\n✅ Done — processed: {processed}, skipped: {skipped}, errors: {errors}")
+    if args.raw_store:
+        raw = RawDocumentStore(args.raw_store).stats()
+        print(f"  raw store      {raw['documents']} docs, {raw['blobs']} blobs, "
+              f"{raw['bytes'] / 1e6:.1f} MB")
+    print(
+        f"\n✅ Done — processed: {counts['processed']}, "
+        f"skipped: {counts['skipped']}, errors: {counts['errors']}"
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,67 @@
+"""
+Section-aware splitting of bill text for map-reduce summarization.
+
+Bill text extracted by the scraper has one structural element per line.
+We cut before PART / DIVISION / SCHEDULE headings and numbered sections
+("12 (1) ...") and then pack consecutive sections into chunks of at most
+``max_chars``, so a chunk never starts mid-section unless the section
+alone is too long. Because boundaries fall on section edges, a small
+amendment usually changes only the chunk containing it, and the other
+chunk summaries come straight from the cache.
+"""
+
+import re
+
+SECTION_START = re.compile(
+    r"^(?:PART|DIVISION|SCHEDULE|PARTIE|SECTION|ANNEXE)\b|^\d+(?:\.\d+)*\s",
+    re.IGNORECASE,
+)
+
+
+def split_sections(text: str) -> list[str]:
+    sections: list[str] = []
+    current: list[str] = []
+    for line in text.splitlines():
+        if SECTION_START.match(line.strip()) and current:
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current))
+    return [s for s in sections if s.strip()]
+
+
+def _hard_split(section: str, max_chars: int) -> list[str]:
+    """Split an oversized section on line boundaries (or mid-line as a last resort)."""
+    pieces: list[str] = []
+    current = ""
+    for line in section.splitlines():
+        while len(line) > max_chars:
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and len(current) + len(line) + 1 > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text: str, max_chars: int) -> list[str]:
+    chunks: list[str] = []
+    current = ""
+    for section in split_sections(text):
+        if len(section) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(_hard_split(section, max_chars))
+            continue
+        if current and len(current) + len(section) + 1 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{section}" if current else section
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,121 @@
+"""
+Thread-safe Gemini client shared by the summarization workers.
+
+- one requests.Session with a connection pool sized to the worker count
+- exponential backoff with jitter on 429 / 5xx / connection errors,
+  honouring Retry-After when the server sends it
+- OAuth token refreshed under a lock when it expires mid-run or a request
+  comes back 401
+"""
+
+import random
+import threading
+import time
+
+import google.auth.transport.requests
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenProvider:
+    """Hands out a valid bearer token, refreshing service-account credentials as needed."""
+
+    def __init__(self, credentials):
+        self._creds = credentials
+        self._lock = threading.Lock()
+
+    def token(self, force_refresh: bool = False) -> str:
+        with self._lock:
+            if force_refresh or not self._creds.valid:
+                self._creds.refresh(google.auth.transport.requests.Request())
+            return self._creds.token
+
+
+class StaticToken:
+    """Token provider for the local mock endpoint, which ignores auth."""
+
+    def __init__(self, token: str = "mock"):
+        self._token = token
+
+    def token(self, force_refresh: bool = False) -> str:
+        return self._token
+
+
+class GeminiClient:
+    def __init__(
+        self,
+        url: str,
+        tokens,
+        pool_size: int = 8,
+        timeout: float = 120.0,
+        max_retries: int = 6,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ):
+        self.url = url
+        self.tokens = tokens
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "token_refreshes": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _backoff(self, attempt: int, retry_after: str | None = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
+
+    def generate(self, prompt_text: str) -> str:
+        """Send one prompt and return the first candidate's text."""
+        payload = {"contents": [{"parts": [{"text": prompt_text}]}]}
+        force_refresh = False
+        last_error: Exception | None = None
+
+        for attempt in range(self.max_retries + 1):
+            headers = {
+                "Authorization": f"Bearer {self.tokens.token(force_refresh)}",
+                "Content-Type": "application/json",
+            }
+            if force_refresh:
+                self._count("token_refreshes")
+            force_refresh = False
+            self._count("requests")
+
+            try:
+                response = self.session.post(
+                    self.url, json=payload, headers=headers, timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                last_error = exc
+                self._count("retries")
+                time.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code == 401 and attempt < self.max_retries:
+                force_refresh = True
+                continue
+            if response.status_code in RETRY_STATUS and attempt < self.max_retries:
+                self._count("retries")
+                time.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+                continue
+
+            response.raise_for_status()
+            result = response.json()
+            return result["candidates"][0]["content"]["parts"][0]["text"]
+
+        raise RuntimeError(f"Gemini request failed after {self.max_retries} retries: {last_error}")
@@ -1,7 +1,75 @@
+"""
+Incrementally index bill text embeddings into Qdrant.
+
+Each point stores a content_hash of the text it was embedded from. A run
+compares those hashes with Postgres and only embeds new or changed bills,
+updates payloads (tags, status, ...) in place when only metadata changed,
+and deletes points for bills that no longer exist. The live collection is
+never dropped, so search stays online while indexing.
+
+  python summaries/generate_embeddings.py             # incremental
+  python summaries/generate_embeddings.py --dry-run   # just report the plan
+  python summaries/generate_embeddings.py --full      # re-embed everything in place
+  python summaries/generate_embeddings.py --chunked   # passage index (bill_chunk_embeddings)
+  python summaries/generate_embeddings.py --rebuild   # build a new version, then swap
+  python summaries/generate_embeddings.py --rollback  # point the alias back one version
+
+bill_text_embeddings (and bill_chunk_embeddings) are Qdrant aliases onto
+versioned collections named <alias>_v<timestamp>. --rebuild indexes a new
+version from scratch and swaps the alias in one atomic operation, keeping
+the previous KEEP_VERSIONS collections around for --rollback.
+
+Index parameters (--hnsw-m, --ef-construct, --on-disk, --quantize) apply
+when a version is created, so change them together with --rebuild. Use
+retrieval/benchmark_index.py to pick values for the collection size.
+
+Each bill point in bill_text_embeddings has three named vectors: "text"
+(text_en), "summary" (llm_summary) and "title" (name_en). Short queries
+match the concise summary vector far better than the truncated full text.
+
+MiniLM only sees the first ~256 word pieces of its input, so a single
+vector per bill covers just the opening of the text. --chunked writes the
+llm_summary plus overlapping passages of text_en as separate points
+(payload bill_id + chunk) into a second collection; the API groups hits
+by bill_id so deep content is retrievable.
+
+With --snapshot DIR (default: $LOCAL_INDEX_PATH) every run that changes
+bill_text_embeddings, and every --rollback, re-exports the snapshot the
+API's NumPy backend memory-maps (retrieval/snapshot.py), keeping its dtype.
+Without it, VECTOR_BACKEND=numpy keeps serving the last export.
+"""
+import argparse
+import hashlib
+import os
+import queue
+import sys
+import threading
+import time
+
 import boto3
 import psycopg2
 from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    CompressionRatio,
+    Distance,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    PayloadSchemaType,
+    PointIdsList,
+    PointStruct,
+    ProductQuantization,
+    ProductQuantizationConfig,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SetPayload,
+    SetPayloadOperation,
+    VectorParams,
+)
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
@@ -40,79 +108,496 @@ PG_CONFIG = {
     "port": DB_PORT,
 }
 
-conn = psycopg2.connect(**PG_CONFIG)
-cur = conn.cursor()
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+QDRANT_PORT = 6333
+COLLECTION_NAME = "bill_text_embeddings"
+CHUNK_COLLECTION_NAME = "bill_chunk_embeddings"
+KEEP_VERSIONS = 2  # previous versions kept for --rollback, besides the live one
+SNAPSHOT_DIR = os.getenv("LOCAL_INDEX_PATH") or None
 
-cur.execute("""
-    SELECT bill_id, text_en
-    FROM bills_billtext
-    ORDER BY created DESC
-""")
+# HNSW / storage profile for new versions (Qdrant defaults: m=16, ef_construct=100).
+HNSW_M = 16
+HNSW_EF_CONSTRUCT = 100
+QUANTIZE_CHOICES = ("none", "int8", "pq")
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"  # ~384D vectors
+VECTOR_SIZE = 384
+VECTOR_NAMES = ("text", "summary", "title")
+# Part of every content hash: bump when the model or text preparation
+# changes so the next run re-embeds everything.
+EMBED_VERSION = "minilm-v1"
+UPSERT_BATCH = 50
+DEFAULT_ENCODE_BATCH = 64
+UPSERT_QUEUE_SIZE = 8  # upsert batches buffered ahead of the uploader thread
+SCROLL_BATCH = 1000
 
-rows = cur.fetchall()
+# Passages for --chunked: ~180 words stays inside MiniLM's 256 word-piece
+# window; the overlap keeps sentences that straddle a boundary intact.
+PASSAGE_WORDS = 180
+PASSAGE_OVERLAP = 40
+MAX_PASSAGES = 200
+# Chunk point ids are bill_id * CHUNK_ID_STRIDE + chunk index.
+CHUNK_ID_STRIDE = 1000
 
-# --- Connect to Qdrant ---
-qdrant = QdrantClient("localhost", port=6333)
+# Filterable payload stored next to each vector; app/services/qdrant.py
+# pushes tag/session/status filters down into the search with these.
+PAYLOAD_TAG_MIN_SCORE = 0.3
+PAYLOAD_MAX_TAGS = 3
+PAYLOAD_INDEXES = {
+    "bill_id": PayloadSchemaType.INTEGER,
+    "tags": PayloadSchemaType.KEYWORD,
+    "session_id": PayloadSchemaType.KEYWORD,
+    "status_code": PayloadSchemaType.KEYWORD,
+    "status_date": PayloadSchemaType.DATETIME,
+    "is_new_bill": PayloadSchemaType.BOOL,
+}
 
-COLLECTION_NAME = "bill_text_embeddings"
 
-if qdrant.collection_exists(COLLECTION_NAME):
-    qdrant.delete_collection(collection_name=COLLECTION_NAME)
+def content_hash(text):
+    return hashlib.sha256(f"{EMBED_VERSION}\n{text}".encode("utf-8")).hexdigest()[:16]
 
-qdrant.create_collection(
-    collection_name=COLLECTION_NAME,
-    vectors_config=VectorParams(size=384, distance=Distance.COSINE),
-)
 
-# --- Load embedding model ---
-model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")  # ~384D vectors
+def passages(text, words=PASSAGE_WORDS, overlap=PASSAGE_OVERLAP, max_passages=MAX_PASSAGES):
+    """Overlapping word windows over ``text``."""
+    tokens = text.split()
+    step = max(1, words - overlap)
+    out = []
+    for start in range(0, max(len(tokens) - overlap, 1), step):
+        out.append(" ".join(tokens[start:start + words]))
+        if len(out) >= max_passages:
+            break
+    return out
 
-# --- Connect to PostgreSQL ---
-conn = psycopg2.connect(**PG_CONFIG)
-cur = conn.cursor()
 
-cur.execute("""
-    SELECT bill_id, text_en
-    FROM bills_billtext
-    ORDER BY created DESC
-""")
+def fetch_texts(cur):
+    """bill_id -> (text_en, llm_summary, name_en) of the most recent text row for each bill."""
+    cur.execute("""
+        SELECT DISTINCT ON (bt.bill_id) bt.bill_id, bt.text_en, bt.llm_summary, b.name_en
+        FROM bills_billtext bt
+        LEFT JOIN bills_bill b ON b.id = bt.bill_id
+        WHERE bt.text_en IS NOT NULL AND bt.text_en <> ''
+        ORDER BY bt.bill_id, bt.created DESC
+    """)
+    return {bill_id: (text, summary, title) for bill_id, text, summary, title in cur.fetchall()}
 
-rows = cur.fetchall()
 
-# --- Connect to Qdrant ---
-qdrant = QdrantClient("localhost", port=6333)
+def bill_points(bill_id, text, summary, title, payload, chunked=False):
+    """
+    [(point_id, text(s), payload), ...] for one bill. Unchunked: a single
+    point with id bill_id and {vector name: text}. Chunked: the summary
+    (chunk 0, if any) then passages, one unnamed vector each.
+    """
+    if not chunked:
+        sources = {"text": text, "summary": summary or text, "title": title or summary or text}
+        digest = content_hash("\n".join(sources[name] for name in VECTOR_NAMES))
+        return [(int(bill_id), sources, dict(payload, content_hash=digest))]
 
-# Create or recreate collection with correct vector size
-if not qdrant.collection_exists(COLLECTION_NAME):
-    qdrant.recreate_collection(
-        collection_name=COLLECTION_NAME,
-        vectors_config=VectorParams(size=384, distance=Distance.COSINE),
-    )
+    pieces = ([summary] if summary else []) + passages(text)
+    digest = content_hash(f"{summary or ''}\n{text}")
+    return [
+        (int(bill_id) * CHUNK_ID_STRIDE + i, piece, dict(payload, content_hash=digest, chunk=i))
+        for i, piece in enumerate(pieces[:CHUNK_ID_STRIDE])
+    ]
+
+
+def fetch_payloads(cur):
+    """bill_id -> payload dict with top tags and bill metadata."""
+    cur.execute(f"""
+        SELECT DISTINCT ON (bt.bill_id)
+               bt.bill_id, b.session_id, b.status_code, b.status_date, bt.is_new_bill,
+               (
+                   SELECT array_agg(t.tag ORDER BY t.score DESC)
+                   FROM (
+                       SELECT tag, score
+                       FROM bills_billtag
+                       WHERE bill_id = bt.bill_id AND score >= {PAYLOAD_TAG_MIN_SCORE}
+                       ORDER BY score DESC
+                       LIMIT {PAYLOAD_MAX_TAGS}
+                   ) t
+               ) AS tags
+        FROM bills_billtext bt
+        JOIN bills_bill b ON b.id = bt.bill_id
+        ORDER BY bt.bill_id, bt.created DESC
+    """)
+    payloads = {}
+    for bill_id, session_id, status_code, status_date, is_new_bill, tags in cur.fetchall():
+        payloads[bill_id] = {
+            "bill_id": bill_id,
+            "tags": list(tags or []),
+            "session_id": session_id,
+            "status_code": status_code,
+            "status_date": status_date.isoformat() if status_date else None,
+            "is_new_bill": bool(is_new_bill),
+        }
+    return payloads
+
+
+def vectors_config(chunked=False, on_disk=False):
+    params = VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE, on_disk=on_disk)
+    if chunked:
+        return params
+    return {name: params for name in VECTOR_NAMES}
 
-# --- Embed and Upload ---
-points = []
 
-for idx, (bill_id, text) in enumerate(tqdm(rows, total=len(rows), desc="Embedding bills")):
-    if text:
-        embedding = model.encode(text).tolist()  # type: ignore
-        point = PointStruct(
-            id=int(bill_id),  # Must be unique
-            vector=embedding,
-            payload={"bill_id": bill_id}
+def quantization_config(quantize="none"):
+    """
+    int8: 4x smaller vectors kept in RAM; searches oversample and rescore
+    with the original float32 vectors. pq: 16x smaller, lower recall.
+    """
+    if quantize == "int8":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
         )
-        points.append(point)
+    if quantize == "pq":
+        return ProductQuantization(
+            product=ProductQuantizationConfig(compression=CompressionRatio.X16, always_ram=True)
+        )
+    return None
+
+
+def collection_params(chunked=False, hnsw_m=HNSW_M, ef_construct=HNSW_EF_CONSTRUCT, on_disk=False,
+                      quantize="none", indexing_threshold=None):
+    """Keyword arguments for create_collection with the given index profile."""
+    return {
+        "vectors_config": vectors_config(chunked, on_disk=on_disk),
+        "hnsw_config": HnswConfigDiff(m=hnsw_m, ef_construct=ef_construct),
+        "quantization_config": quantization_config(quantize),
+        "optimizers_config": (
+            OptimizersConfigDiff(indexing_threshold=indexing_threshold)
+            if indexing_threshold is not None else None
+        ),
+    }
+
+
+def ensure_collection(qdrant, collection_name, chunked=False, index_params=None):
+    if not qdrant.collection_exists(collection_name):
+        params = dict(index_params or {})
+        qdrant.create_collection(
+            collection_name=collection_name,
+            **collection_params(chunked, **params),
+        )
+        print(f"Created collection {collection_name}" + (f" {params}" if params else ""))
+    elif not chunked:
+        params = qdrant.get_collection(collection_name).config.params.vectors
+        if not isinstance(params, dict):
+            raise SystemExit(
+                f"{collection_name} still uses the single unnamed vector layout; "
+                "rerun with --rebuild to build a named-vector version"
+            )
+    ensure_payload_indexes(qdrant, collection_name)
+
+
+def ensure_payload_indexes(qdrant, collection_name):
+    for field, schema in PAYLOAD_INDEXES.items():
+        qdrant.create_payload_index(
+            collection_name=collection_name,
+            field_name=field,
+            field_schema=schema,
+        )
+
+
+def versioned_name(alias):
+    return f"{alias}_v{time.strftime('%Y%m%d%H%M%S')}"
+
+
+def list_versions(qdrant, alias):
+    """Versioned collections behind ``alias``, oldest first."""
+    prefix = f"{alias}_v"
+    return sorted(c.name for c in qdrant.get_collections().collections if c.name.startswith(prefix))
+
+
+def alias_target(qdrant, alias):
+    for item in qdrant.get_aliases().aliases:
+        if item.alias_name == alias:
+            return item.collection_name
+    return None
+
+
+def swap_alias(qdrant, alias, collection_name):
+    """Repoint ``alias`` at ``collection_name`` in a single atomic request."""
+    operations = []
+    if alias_target(qdrant, alias) is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    elif qdrant.collection_exists(alias):
+        # One-time migration: a plain collection still holds the alias name.
+        print(f"Dropping legacy collection {alias} so it can become an alias")
+        qdrant.delete_collection(collection_name=alias)
+    operations.append(CreateAliasOperation(
+        create_alias=CreateAlias(collection_name=collection_name, alias_name=alias)
+    ))
+    qdrant.update_collection_aliases(change_aliases_operations=operations)
+    print(f"Alias {alias} -> {collection_name}")
+
+
+def prune_versions(qdrant, alias, keep=KEEP_VERSIONS):
+    live = alias_target(qdrant, alias)
+    older = [name for name in list_versions(qdrant, alias) if name != live and (live is None or name < live)]
+    for name in older[:-keep] if keep else older:
+        qdrant.delete_collection(collection_name=name)
+        print(f"Deleted old version {name}")
+
+
+def rollback(qdrant, alias):
+    live = alias_target(qdrant, alias)
+    previous = [name for name in list_versions(qdrant, alias) if live is None or name < live]
+    if not previous:
+        raise SystemExit(f"No earlier version of {alias} to roll back to")
+    swap_alias(qdrant, alias, previous[-1])
+
+
+def indexed_payloads(qdrant, collection_name):
+    """point id -> stored payload for every point in the collection."""
+    existing = {}
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=collection_name,
+            limit=SCROLL_BATCH,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        for point in points:
+            existing[int(point.id)] = point.payload or {}
+        if offset is None:
+            return existing
+
+
+def plan_changes(texts, payloads, existing, full=False, chunked=False):
+    """
+    Compare Postgres with the collection, per bill.
+
+    to_embed: [(point_id, text, payload)] points of bills with new or changed text
+    to_repayload: [(point_ids, payload)] same text, different metadata
+    to_delete: [point_id] points of removed bills, or stale chunks
+    Returns (to_embed, to_repayload, to_delete, changed_bills).
+    """
+    by_bill = {}
+    for point_id, payload in existing.items():
+        by_bill.setdefault(payload.get("bill_id"), {})[point_id] = payload
+
+    to_embed, to_repayload, to_delete = [], [], []
+    changed = 0
+    for bill_id, (text, summary, title) in texts.items():
+        base = payloads.get(bill_id, {"bill_id": bill_id})
+        points = bill_points(bill_id, text, summary, title, base, chunked=chunked)
+        current = by_bill.pop(bill_id, {})
+        wanted = {point_id for point_id, _, _ in points}
+        digest = points[0][2]["content_hash"]
+        stale = full or set(current) != wanted or any(
+            p.get("content_hash") != digest for p in current.values()
+        )
+        if stale:
+            to_embed.extend(points)
+            to_delete.extend(sorted(set(current) - wanted))
+            changed += 1
+        elif any({k: v for k, v in p.items() if k != "chunk"} != dict(base, content_hash=digest)
+                 for p in current.values()):
+            to_repayload.append((sorted(current), dict(base, content_hash=digest)))
+
+    for leftover in by_bill.values():
+        to_delete.extend(sorted(leftover))
+    return to_embed, to_repayload, to_delete, changed
+
+
+def encode_batch(model, sources, batch_size):
+    """Vectors for a batch of str (unnamed) or {name: str} (named) sources."""
+    if isinstance(sources[0], str):
+        return [v.tolist() for v in model.encode(sources, batch_size=batch_size, show_progress_bar=False)]
+    by_name = {
+        name: model.encode([src[name] for src in sources], batch_size=batch_size, show_progress_bar=False)
+        for name in VECTOR_NAMES
+    }
+    return [{name: by_name[name][i].tolist() for name in VECTOR_NAMES} for i in range(len(sources))]
+
+
+def source_length(source):
+    return len(source if isinstance(source, str) else source["text"])
+
+
+def upsert_embeddings(qdrant, collection_name, model, to_embed, batch_size=DEFAULT_ENCODE_BATCH):
+    """
+    Encode in length-sorted batches (so padding stays small) while a
+    background thread upserts the previous batches. Returns timing stats.
+    """
+    to_embed = sorted(to_embed, key=lambda item: source_length(item[1]))
+    pending = queue.Queue(maxsize=UPSERT_QUEUE_SIZE)
+    stats = {"encode_s": 0.0, "upsert_s": 0.0, "points": 0}
+    errors = []
+
+    def uploader():
+        while True:
+            points = pending.get()
+            if points is None:
+                return
+            if errors:
+                continue  # drain so the producer never blocks
+            start = time.perf_counter()
+            try:
+                qdrant.upsert(collection_name=collection_name, points=points)
+                stats["points"] += len(points)
+            except Exception as exc:
+                errors.append(exc)
+            stats["upsert_s"] += time.perf_counter() - start
+
+    thread = threading.Thread(target=uploader, name="qdrant-upsert", daemon=True)
+    thread.start()
+    start = time.perf_counter()
+    try:
+        with tqdm(total=len(to_embed), desc="Embedding points") as progress:
+            for i in range(0, len(to_embed), batch_size):
+                if errors:
+                    break
+                batch = to_embed[i:i + batch_size]
+                t0 = time.perf_counter()
+                vectors = encode_batch(model, [source for _, source, _ in batch], batch_size)
+                stats["encode_s"] += time.perf_counter() - t0
+                points = [
+                    PointStruct(id=point_id, vector=vector, payload=payload)
+                    for (point_id, _, payload), vector in zip(batch, vectors)
+                ]
+                for j in range(0, len(points), UPSERT_BATCH):
+                    pending.put(points[j:j + UPSERT_BATCH])
+                progress.update(len(batch))
+    finally:
+        pending.put(None)
+        thread.join()
+    stats["elapsed_s"] = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    return stats
+
+
+def update_payloads(qdrant, collection_name, to_repayload):
+    for i in range(0, len(to_repayload), SCROLL_BATCH):
+        qdrant.batch_update_points(
+            collection_name=collection_name,
+            update_operations=[
+                SetPayloadOperation(set_payload=SetPayload(payload=payload, points=point_ids))
+                for point_ids, payload in to_repayload[i:i + SCROLL_BATCH]
+            ],
+        )
+
+
+def refresh_snapshot(qdrant, alias, snapshot_dir):
+    """Re-export the local-index snapshot of ``alias``, keeping the previous export's dtype."""
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+    from retrieval.snapshot import export_snapshot, read_manifest
+
+    try:
+        dtype = read_manifest(snapshot_dir).get("dtype", "float32")
+    except FileNotFoundError:
+        dtype = "float32"
+    manifest = export_snapshot(qdrant, alias, snapshot_dir, dtype=dtype)
+    print(f"Snapshot: exported {manifest['count']} points from {manifest['source']} "
+          f"to {snapshot_dir} ({dtype})")
+
+
+def main(dry_run=False, full=False, batch_size=DEFAULT_ENCODE_BATCH, chunked=False,
+         rebuild=False, rollback_alias=False, index_params=None, snapshot_dir=None):
+    alias = CHUNK_COLLECTION_NAME if chunked else COLLECTION_NAME
+    qdrant = QdrantClient(QDRANT_HOST, port=QDRANT_PORT)
+    # The local index serves the per-bill collection only.
+    snapshot_dir = None if chunked else snapshot_dir
+    if rollback_alias:
+        rollback(qdrant, alias)
+        if snapshot_dir:
+            refresh_snapshot(qdrant, alias, snapshot_dir)
+        return
+
+    conn = psycopg2.connect(**PG_CONFIG)
+    cur = conn.cursor()
+    texts = fetch_texts(cur)
+    payloads = fetch_payloads(cur)
+    cur.close()
+    conn.close()
+    print(f"Bills with text: {len(texts)}")
+
+    # Incremental runs write into the live version; a rebuild (or the first
+    # run) fills a fresh version that only goes live once it is complete.
+    live = alias_target(qdrant, alias)
+    if rebuild or live is None:
+        collection_name = versioned_name(alias)
+        existing = {}
+        print(f"Building new version {collection_name}" + (f" (live: {live})" if live else ""))
+    else:
+        collection_name = live
+        if not dry_run:
+            ensure_collection(qdrant, collection_name, chunked=chunked)
+        existing = indexed_payloads(qdrant, collection_name)
+        print(f"Points in {alias} ({collection_name}): {len(existing)}")
+
+    to_embed, to_repayload, to_delete, changed = plan_changes(
+        texts, payloads, existing, full=full, chunked=chunked
+    )
+    unchanged = len(texts) - changed - len(to_repayload)
+    print(f"Bills to embed: {changed} ({len(to_embed)} points) | payload only: {len(to_repayload)} | "
+          f"points to delete: {len(to_delete)} | unchanged: {unchanged}")
+    if dry_run:
+        return
+
+    if collection_name != live:
+        ensure_collection(qdrant, collection_name, chunked=chunked, index_params=index_params)
+    if to_embed:
+        model = SentenceTransformer(MODEL_NAME)
+        stats = upsert_embeddings(qdrant, collection_name, model, to_embed, batch_size=batch_size)
+        elapsed = stats["elapsed_s"]
+        rate = stats["points"] / elapsed if elapsed else 0.0
+        unit = "passages" if chunked else "bills"
+        print(f"Embedded {stats['points']} {unit} in {elapsed:.1f}s ({rate:.1f} {unit}/s, "
+              f"batch size {batch_size}; encode {stats['encode_s']:.1f}s, "
+              f"upsert {stats['upsert_s']:.1f}s in background)")
+    if to_repayload:
+        update_payloads(qdrant, collection_name, to_repayload)
+    if to_delete:
+        qdrant.delete(
+            collection_name=collection_name,
+            points_selector=PointIdsList(points=to_delete),
+        )
+
+    if collection_name != live:
+        swap_alias(qdrant, alias, collection_name)
+        prune_versions(qdrant, alias)
 
-        # Upload in batches
-        if len(points) >= 50:
-            qdrant.upsert(collection_name=COLLECTION_NAME, points=points)
-            points = []
+    if snapshot_dir and (to_embed or to_repayload or to_delete or collection_name != live):
+        refresh_snapshot(qdrant, alias, snapshot_dir)
 
-# Upload remaining
-if points:
-    qdrant.upsert(collection_name=COLLECTION_NAME, points=points)
+    print("Done: Embeddings stored in Qdrant.")
 
-print("Done: Embeddings stored in Qdrant.")
 
-# --- Cleanup ---
-cur.close()
-conn.close()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally embed bill text into Qdrant.")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change and exit")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-embed every bill (in place; the collection is not dropped)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_ENCODE_BATCH,
+                        help=f"Texts per model.encode call (default: {DEFAULT_ENCODE_BATCH})")
+    parser.add_argument("--chunked", action="store_true",
+                        help=f"Index summary + overlapping passages into {CHUNK_COLLECTION_NAME}")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Index into a new versioned collection and swap the alias when done")
+    parser.add_argument("--rollback", action="store_true",
+                        help="Point the alias back at the previous version and exit")
+    parser.add_argument("--hnsw-m", type=int, default=HNSW_M, help="HNSW graph degree for new versions")
+    parser.add_argument("--ef-construct", type=int, default=HNSW_EF_CONSTRUCT,
+                        help="HNSW build-time beam width for new versions")
+    parser.add_argument("--on-disk", action="store_true",
+                        help="Keep original vectors on disk (pair with --quantize int8)")
+    parser.add_argument("--quantize", choices=QUANTIZE_CHOICES, default="none",
+                        help="Vector quantization for new versions")
+    parser.add_argument("--indexing-threshold", type=int, default=None,
+                        help="KB of vectors before Qdrant builds HNSW (Qdrant default 20000; "
+                             "below it searches are brute force)")
+    parser.add_argument("--snapshot", default=SNAPSHOT_DIR,
+                        help="Re-export the local-index snapshot here after changes "
+                             "(default: $LOCAL_INDEX_PATH; '' to skip)")
+    args = parser.parse_args()
+    main(dry_run=args.dry_run, full=args.full, batch_size=max(1, args.batch_size),
+         chunked=args.chunked, rebuild=args.rebuild, rollback_alias=args.rollback,
+         index_params={
+             "hnsw_m": args.hnsw_m,
+             "ef_construct": args.ef_construct,
+             "on_disk": args.on_disk,
+             "quantize": args.quantize,
+             "indexing_threshold": args.indexing_threshold,
+         },
+         snapshot_dir=args.snapshot or None)
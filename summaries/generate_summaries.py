@@ -1,14 +1,32 @@
 import json
+import os
+import time
 import boto3
 import psycopg2
-import requests
+import psycopg2.extras
 import argparse
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from google.oauth2 import service_account
-import google.auth.transport.requests
-from sentence_transformers import SentenceTransformer
 
-GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
-ssm = boto3.client('ssm', region_name='ca-central-1')
+import summary_cache
+from chunking import chunk_text
+from gemini_client import GeminiClient, StaticToken, TokenProvider
+
+GEMINI_URL = os.getenv(
+    "GEMINI_URL",
+    "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent",
+)
+# Bump when build_prompt changes; cached summaries from other versions are ignored.
+PROMPT_VERSION = "v1"
+MAX_INPUT_CHARS = 12000
+# Chunked (map-reduce) mode for bills longer than MAX_INPUT_CHARS.
+CHUNK_PROMPT_VERSION = "chunk-v1"
+REDUCE_PROMPT_VERSION = "reduce-v1"
+CHUNKED_PROMPT_VERSION = f"{CHUNK_PROMPT_VERSION}+{REDUCE_PROMPT_VERSION}"
+CHUNK_CHARS = 8000
+DEFAULT_WORKERS = 8
+DEFAULT_COMMIT_EVERY = 25
 
 PARAMETER_NAMES = [
     '/billBoard/GEMINI_API_KEY',
@@ -18,6 +36,7 @@ PARAMETER_NAMES = [
 ]
 
 def get_parameters(names, with_decryption=True):
+    ssm = boto3.client('ssm', region_name='ca-central-1')
     response = ssm.get_parameters(
         Names=names,
         WithDecryption=with_decryption
@@ -27,15 +46,14 @@ def get_parameters(names, with_decryption=True):
         print(f"Missing parameters: {response['InvalidParameters']}")
     return parameters
 
-creds = get_parameters(PARAMETER_NAMES)
+# Fetched on first use, so --no-auth --local-db runs need no AWS access.
+@lru_cache(maxsize=None)
+def get_creds():
+    return get_parameters(PARAMETER_NAMES)
 
-GEMINI_API_KEY = creds['/billBoard/GEMINI_API_KEY']
-DB_HOST = creds['/billBoard/DB_HOST']
 DB_PORT = 5432
 DB_NAME = 'postgres'
 DB_USER = 'postgres'
-DB_PASS = creds['/billBoard/DB_PASSWORD']
-SERVICE_ACCOUNT_JSON = creds['/billBoard/SERVICE_ACCOUNT_JSON']
 
 # --- Local Config --- change as needed this works for my local db
 PG_CONFIG = {
@@ -47,22 +65,15 @@ PG_CONFIG = {
 }
 
 
-def get_token():
-    service_account_info = json.loads(SERVICE_ACCOUNT_JSON)
-    creds = service_account.Credentials.from_service_account_info(
+def get_credentials():
+    service_account_info = json.loads(get_creds()['/billBoard/SERVICE_ACCOUNT_JSON'])
+    return service_account.Credentials.from_service_account_info(
         service_account_info,
         scopes=["https://www.googleapis.com/auth/generative-language"]
     )
-    creds.refresh(google.auth.transport.requests.Request())
-    return creds.token
-
-def summarize(text, token):
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
 
-    prompt_text = (
+def build_prompt(text):
+    return (
     "You are an AI tasked with summarizing Canadian legal bills. "
     "Do not include any introductory phrases or conversational responses and do not format it in markdown. "
     "Just output the summary based on provided text only.\n\n"
@@ -70,40 +81,126 @@ def summarize(text, token):
     "- Begin with a short, clear introduction explaining what the bill is and its purpose.\n"
     "- Be followed by bullet points outlining the key changes, impacts, and takeaways.\n"
     "- Be written in plain, unbiased language and take no more than 1 minute to read.\n\n"
-    f"{text[:12000]}"
+    f"{text[:MAX_INPUT_CHARS]}"
 )
 
+def build_chunk_prompt(chunk):
+    return (
+    "You are an AI helping summarize a long Canadian legal bill one part at a time. "
+    "Do not include any introductory phrases and do not format it in markdown.\n\n"
+    "List, as short plain-language bullet points, the concrete changes, obligations "
+    "and affected groups in this excerpt. Skip boilerplate, definitions and "
+    "coming-into-force provisions unless they matter.\n\n"
+    f"{chunk}"
+)
 
-    payload = {
-        "contents": [
-            {
-                "parts": [
-                    {"text": prompt_text}
-                ]
-            }
-        ]
-    }
+def build_reduce_prompt(partials):
+    notes = "\n\n".join(f"Part {i + 1}:\n{p}" for i, p in enumerate(partials))
+    return (
+    "You are an AI tasked with summarizing Canadian legal bills. "
+    "Do not include any introductory phrases or conversational responses and do not format it in markdown. "
+    "Below are notes on each part of one bill, in order. Using only these notes, write the summary.\n\n"
+    "The summary should:\n"
+    "- Begin with a short, clear introduction explaining what the bill is and its purpose.\n"
+    "- Be followed by bullet points outlining the key changes, impacts, and takeaways.\n"
+    "- Be written in plain, unbiased language and take no more than 1 minute to read.\n\n"
+    f"{notes}"
+)
 
-    response = requests.post(GEMINI_URL, json=payload, headers=headers)
-    response.raise_for_status()
-    result = response.json()
-    return result["candidates"][0]["content"]["parts"][0]["text"]
+def model_input(text):
+    """The part of the bill text the model actually sees; this is what gets hashed."""
+    return (text or "")[:MAX_INPUT_CHARS]
 
-def main(no_old_status_clear=False):
-    token = get_token()
+def summarize(text, client):
+    """Single-pass summary. Returns (summary, new chunk cache entries)."""
+    return client.generate(build_prompt(text)), {}
 
-    conn = psycopg2.connect(
-        host=DB_HOST,
-        port=DB_PORT,
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=DB_PASS
-    )
-    cursor = conn.cursor()
+def summarize_chunked(chunks, chunk_cache, client, chunk_pool):
+    """
+    Map-reduce summary of a long bill. ``chunks`` is a list of
+    (input_hash, chunk_text); chunks already in ``chunk_cache`` are not sent
+    again. Returns (summary, {input_hash: chunk_summary} for new chunks).
+    """
+    futures = {}
+    for h, chunk in chunks:
+        if h not in chunk_cache and h not in futures:
+            futures[h] = chunk_pool.submit(client.generate, build_chunk_prompt(chunk))
+    new_entries = {h: f.result() for h, f in futures.items()}
+    partials = [chunk_cache.get(h) or new_entries[h] for h, _ in chunks]
+    return client.generate(build_reduce_prompt(partials)), new_entries
 
-    # --- Connect to PostgreSQL ---
-    # conn = psycopg2.connect(**PG_CONFIG)
-    # cursor = conn.cursor()
+def flush_summaries(conn, cursor, pending, new_cache_entries):
+    """
+    Write a batch of (summary, input_hash, prompt_version, bill_id) updates
+    plus any new cache entries ({(input_hash, prompt_version): summary}) in
+    one transaction.
+    """
+    if not pending:
+        return 0
+    by_version = {}
+    for (h, version), summary in new_cache_entries.items():
+        by_version.setdefault(version, {})[h] = summary
+    for version, entries in by_version.items():
+        summary_cache.store(cursor, entries, version)
+    psycopg2.extras.execute_batch(cursor, """
+        UPDATE bills_billtext
+        SET llm_summary = %s,
+            llm_summary_hash = %s,
+            llm_summary_prompt = %s,
+            is_new_bill = CASE WHEN llm_summary IS NULL THEN 1 ELSE is_new_bill END
+        WHERE bill_id = %s
+    """, pending)
+    conn.commit()
+    written = len(pending)
+    pending.clear()
+    new_cache_entries.clear()
+    return written
+
+def seed_cache(conn, cursor):
+    """
+    Backfill the cache from summaries written before it existed. Those were
+    produced by the v1 prompt, so they are recorded under that version.
+    """
+    cursor.execute(f"""
+        UPDATE bills_billtext
+        SET llm_summary_hash = encode(sha256(convert_to(left(text_en, {MAX_INPUT_CHARS}), 'UTF8')), 'hex'),
+            llm_summary_prompt = 'v1'
+        WHERE llm_summary IS NOT NULL
+          AND llm_summary_prompt IS NULL
+          AND text_en IS NOT NULL
+    """)
+    backfilled = cursor.rowcount
+    cursor.execute(f"""
+        INSERT INTO {summary_cache.CACHE_TABLE} (input_hash, prompt_version, summary)
+        SELECT DISTINCT ON (llm_summary_hash, llm_summary_prompt)
+               llm_summary_hash, llm_summary_prompt, llm_summary
+        FROM bills_billtext
+        WHERE llm_summary IS NOT NULL AND llm_summary_hash IS NOT NULL
+        ORDER BY llm_summary_hash, llm_summary_prompt, created DESC
+        ON CONFLICT (input_hash, prompt_version) DO NOTHING
+    """)
+    conn.commit()
+    print(f"Seeded summary cache: {backfilled} rows hashed, {cursor.rowcount} cache entries added")
+
+def main(no_old_status_clear=False, workers=DEFAULT_WORKERS, commit_every=DEFAULT_COMMIT_EVERY,
+         gemini_url=GEMINI_URL, no_auth=False, local_db=False, refresh_stale=False,
+         seed=False, chunked=False):
+    tokens = StaticToken() if no_auth else TokenProvider(get_credentials())
+    # Chunk requests run in their own pool alongside the per-bill workers.
+    client = GeminiClient(gemini_url, tokens, pool_size=workers * 2 if chunked else workers)
+
+    if local_db:
+        conn = psycopg2.connect(**PG_CONFIG)
+    else:
+        creds = get_creds()
+        conn = psycopg2.connect(
+            host=creds['/billBoard/DB_HOST'],
+            port=DB_PORT,
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=creds['/billBoard/DB_PASSWORD']
+        )
+    cursor = conn.cursor()
 
     cursor.execute("""
         DO $$
@@ -123,8 +220,17 @@ def main(no_old_status_clear=False):
         END
         $$;
     """)
+    cursor.execute("""
+        ALTER TABLE bills_billtext
+        ADD COLUMN IF NOT EXISTS llm_summary_hash TEXT,
+        ADD COLUMN IF NOT EXISTS llm_summary_prompt TEXT
+    """)
+    summary_cache.ensure_cache_table(cursor)
     conn.commit()
 
+    if seed:
+        seed_cache(conn, cursor)
+
     if not no_old_status_clear:
         cursor.execute("""
             UPDATE bills_billtext
@@ -133,41 +239,133 @@ def main(no_old_status_clear=False):
         """)
         conn.commit()
 
-    cursor.execute("""
-        SELECT bill_id, text_en FROM bills_billtext
-        WHERE llm_summary IS NULL
-        ORDER BY created DESC
-    """)
+    if refresh_stale:
+        current_versions = [PROMPT_VERSION, CHUNKED_PROMPT_VERSION] if chunked else [PROMPT_VERSION]
+        cursor.execute("""
+            SELECT bill_id, text_en FROM bills_billtext
+            WHERE llm_summary IS NULL
+               OR llm_summary_prompt IS NULL
+               OR NOT (llm_summary_prompt = ANY(%s))
+            ORDER BY created DESC
+        """, (current_versions,))
+    else:
+        cursor.execute("""
+            SELECT bill_id, text_en FROM bills_billtext
+            WHERE llm_summary IS NULL
+            ORDER BY created DESC
+        """)
     bills = cursor.fetchall()
 
-    results = []
-
+    # Group rows by the exact model input so each distinct text is sent once.
+    # Keys are (input_hash, prompt_version); long bills in chunked mode are
+    # keyed on their full text.
+    by_key = {}
+    texts = {}
     for bill_id, full_text in bills:
-        try:
-            summary = summarize(full_text, token)
-            print(f"--- Bill ID: {bill_id} ---")
+        if not full_text:
+            continue
+        if chunked and len(full_text) > MAX_INPUT_CHARS:
+            key = (summary_cache.input_hash(full_text), CHUNKED_PROMPT_VERSION)
+        else:
+            key = (summary_cache.input_hash(model_input(full_text)), PROMPT_VERSION)
+        by_key.setdefault(key, []).append(bill_id)
+        texts[key] = full_text
+
+    cached = {}
+    for version in {v for _, v in by_key}:
+        hits = summary_cache.lookup(cursor, [h for h, v in by_key if v == version], version)
+        cached.update({(h, version): summary for h, summary in hits.items()})
+    to_generate = [key for key in by_key if key not in cached]
+
+    chunk_plan = {}
+    chunk_cache = {}
+    if chunked:
+        for key in to_generate:
+            if key[1] == CHUNKED_PROMPT_VERSION:
+                chunks = chunk_text(texts[key], CHUNK_CHARS)
+                chunk_plan[key] = [(summary_cache.input_hash(c), c) for c in chunks]
+        chunk_hashes = [h for plan in chunk_plan.values() for h, _ in plan]
+        chunk_cache = summary_cache.lookup(cursor, chunk_hashes, CHUNK_PROMPT_VERSION)
+        print(f"Chunked mode: {len(chunk_plan)} long bills, {len(set(chunk_hashes))} distinct chunks, "
+              f"{len(chunk_cache)} chunk summaries cached")
+
+    print(f"{len(bills)} bills need summaries: {len(by_key)} distinct texts, "
+          f"{len(cached)} cached, {len(to_generate)} to generate with {workers} workers")
+
+    summarized = 0
+    failed = 0
+    pending = []
+    new_entries = {}
+    start = time.perf_counter()
+
+    for key, summary in cached.items():
+        pending.extend((summary, key[0], key[1], bill_id) for bill_id in by_key[key])
+    try:
+        summarized += flush_summaries(conn, cursor, pending, new_entries)
+    except Exception as e:
+        print(f"Error writing cached summaries: {e}")
+        conn.rollback()
+        failed += len(pending)
+        pending.clear()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, \
+            ThreadPoolExecutor(max_workers=workers) as chunk_pool:
+        futures = {}
+        for key in to_generate:
+            if key in chunk_plan:
+                future = pool.submit(summarize_chunked, chunk_plan[key], chunk_cache, client, chunk_pool)
+            else:
+                future = pool.submit(summarize, texts[key], client)
+            futures[future] = key
+        for future in as_completed(futures):
+            key = futures[future]
+            bill_ids = by_key[key]
+            try:
+                summary, chunk_entries = future.result()
+            except Exception as e:
+                print(f"Error summarizing bill {bill_ids[0]}: {e}")
+                failed += len(bill_ids)
+                continue
+
+            print(f"--- Bill ID: {', '.join(str(b) for b in bill_ids)} ---")
             print(summary)
             print("\n\n")
-            results.append({
-                "bill_id": bill_id,
-                "summary": summary
-            })
-
-            cursor.execute("""
-                    UPDATE bills_billtext
-                    SET llm_summary = %s, is_new_bill = 1
-                    WHERE bill_id = %s
-                """, (summary, bill_id))
-            conn.commit()
-
-        except Exception as e:
-            print(f"Error summarizing bill {bill_id}: {e}")
-            conn.rollback()
+            new_entries[key] = summary
+            new_entries.update({(h, CHUNK_PROMPT_VERSION): s for h, s in chunk_entries.items()})
+            pending.extend((summary, key[0], key[1], bill_id) for bill_id in bill_ids)
+
+            if len(pending) >= commit_every:
+                try:
+                    summarized += flush_summaries(conn, cursor, pending, new_entries)
+                except Exception as e:
+                    print(f"Error writing summaries: {e}")
+                    conn.rollback()
+                    failed += len(pending)
+                    pending.clear()
+                    new_entries.clear()
+
+    try:
+        summarized += flush_summaries(conn, cursor, pending, new_entries)
+    except Exception as e:
+        print(f"Error writing summaries: {e}")
+        conn.rollback()
+        failed += len(pending)
+
+    elapsed = time.perf_counter() - start
+    rate = summarized / elapsed if elapsed else 0.0
+    print(f"Summarized {summarized} bills in {elapsed:.1f}s ({rate:.2f} bills/s), {failed} failed")
+    print(f"Gemini client: {client.stats}")
 
     cursor.close()
     conn.close()
 
-    return {"status": "tested", "summarized_count": len(results)}
+    return {
+        "status": "tested",
+        "summarized_count": summarized,
+        "cache_hits": len(cached),
+        "generated_count": len(to_generate),
+        "failed_count": failed,
+    }
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate LLM summaries for bills.")
@@ -176,7 +374,49 @@ if __name__ == "__main__":
         action="store_true",
         help="Skip clearing old is_new_bill values; newly summarized bills are still marked as new."
     )
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_WORKERS,
+        help=f"Concurrent Gemini requests (default: {DEFAULT_WORKERS})"
+    )
+    parser.add_argument(
+        "--commit-every", type=int, default=DEFAULT_COMMIT_EVERY,
+        help=f"Summaries written per DB commit (default: {DEFAULT_COMMIT_EVERY})"
+    )
+    parser.add_argument(
+        "--gemini-url", default=GEMINI_URL,
+        help="Override the Gemini endpoint, e.g. the local mock from summaries/mock_gemini.py"
+    )
+    parser.add_argument(
+        "--no-auth", action="store_true",
+        help="Send a dummy token instead of service-account credentials (mock endpoint only)"
+    )
+    parser.add_argument(
+        "--local-db", action="store_true",
+        help="Use the local PG_CONFIG database instead of the shared one"
+    )
+    parser.add_argument(
+        "--refresh-stale", action="store_true",
+        help=f"Also re-summarize bills whose summary was not made with prompt {PROMPT_VERSION}"
+    )
+    parser.add_argument(
+        "--seed-cache", action="store_true",
+        help="Backfill the summary cache from existing summaries before running"
+    )
+    parser.add_argument(
+        "--chunked", action="store_true",
+        help=f"Map-reduce bills longer than {MAX_INPUT_CHARS} chars instead of truncating them"
+    )
     args = parser.parse_args()
 
-    response = main(no_old_status_clear=args.no_old_status_clear)
+    response = main(
+        no_old_status_clear=args.no_old_status_clear,
+        workers=max(1, args.workers),
+        commit_every=max(1, args.commit_every),
+        gemini_url=args.gemini_url,
+        no_auth=args.no_auth,
+        local_db=args.local_db,
+        refresh_stale=args.refresh_stale,
+        seed=args.seed_cache,
+        chunked=args.chunked,
+    )
     print("Response:", response)
@@ -0,0 +1,67 @@
+"""
+Local stand-in for the Gemini generateContent endpoint, for exercising the
+summarization runner without credentials or quota. With --no-auth and
+--local-db the runner skips the SSM lookup entirely.
+
+Usage:
+    python summaries/mock_gemini.py --port 8765 --latency 0.5 --fail-rate 0.2
+    python summaries/generate_summaries.py --gemini-url http://localhost:8765/generate --no-auth --local-db
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(latency: float, fail_rate: float):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency * random.uniform(0.5, 1.5))
+
+            if random.random() < fail_rate:
+                status = random.choice([429, 503])
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                return
+
+            try:
+                prompt = json.loads(body)["contents"][0]["parts"][0]["text"]
+            except (ValueError, KeyError, IndexError):
+                self.send_response(400)
+                self.end_headers()
+                return
+
+            digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+            text = (
+                f"Mock summary {digest} of a {len(prompt)}-character prompt.\n"
+                "- First key change.\n- Second key change."
+            )
+            out = json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock Gemini endpoint.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean seconds per response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of 429/503 responses")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.latency, args.fail_rate))
+    print(f"Mock Gemini listening on http://127.0.0.1:{args.port}/generate")
+    server.serve_forever()
@@ -0,0 +1,54 @@
+"""
+Content-addressed cache of LLM summaries.
+
+Entries are keyed by (input_hash, prompt_version), where input_hash is the
+SHA-256 of exactly the text sent to the model. Identical bill texts share
+one summary, and bumping a prompt version only misses the entries built
+with that prompt.
+"""
+
+import hashlib
+
+import psycopg2.extras
+
+CACHE_TABLE = "bills_summary_cache"
+
+
+def input_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def ensure_cache_table(cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CACHE_TABLE} (
+            input_hash     TEXT NOT NULL,
+            prompt_version TEXT NOT NULL,
+            summary        TEXT NOT NULL,
+            created        TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (input_hash, prompt_version)
+        )
+    """)
+
+
+def lookup(cursor, hashes, prompt_version: str) -> dict:
+    """Return {input_hash: summary} for the hashes already cached under prompt_version."""
+    hashes = list(set(hashes))
+    if not hashes:
+        return {}
+    cursor.execute(f"""
+        SELECT input_hash, summary
+        FROM {CACHE_TABLE}
+        WHERE prompt_version = %s AND input_hash = ANY(%s)
+    """, (prompt_version, hashes))
+    return dict(cursor.fetchall())
+
+
+def store(cursor, entries, prompt_version: str):
+    """Insert {input_hash: summary} entries; existing keys are left untouched."""
+    if not entries:
+        return
+    psycopg2.extras.execute_values(cursor, f"""
+        INSERT INTO {CACHE_TABLE} (input_hash, prompt_version, summary)
+        VALUES %s
+        ON CONFLICT (input_hash, prompt_version) DO NOTHING
+    """, [(h, prompt_version, s) for h, s in entries.items()])
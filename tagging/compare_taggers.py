@@ -0,0 +1,110 @@
+"""
+Compare the prefilter tagging engine against the full BART-MNLI pass on a
+sample of bills: speed, top-1 / top-2 agreement, and how many of the labels
+the full pass scores above the display threshold survive the prefilter.
+
+Usage:
+    python tagging/compare_taggers.py --sample 200 --top-k 6
+"""
+
+import argparse
+import time
+
+import boto3
+import psycopg2
+
+from tagger import DEFAULT_BATCH_SIZE, DEFAULT_TOP_K, FullTagger, PrefilterTagger, load_classifier, load_labels, load_tags
+
+DISPLAY_THRESHOLD = 0.3  # matches TAG_MIN_SCORE in app/services/db.py
+
+ssm = boto3.client("ssm", region_name="ca-central-1")
+PARAMETER_NAMES = [
+    "/billBoard/DB_HOST",
+    "/billBoard/DB_PASSWORD",
+]
+
+
+def get_parameters(names, with_decryption=True):
+    response = ssm.get_parameters(Names=names, WithDecryption=with_decryption)
+    parameters = {p["Name"]: p["Value"] for p in response["Parameters"]}
+    if response["InvalidParameters"]:
+        print(f"Missing parameters: {response['InvalidParameters']}")
+    return parameters
+
+
+creds = get_parameters(PARAMETER_NAMES)
+PG_CONFIG = {
+    "dbname": "postgres",
+    "user": "postgres",
+    "password": creds["/billBoard/DB_PASSWORD"],
+    "host": creds["/billBoard/DB_HOST"],
+    "port": 5432,
+}
+
+
+def top_labels(scores, n):
+    return [label for label, _ in sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n]]
+
+
+def run(engine, summaries, batch_size):
+    start = time.perf_counter()
+    results = []
+    for i in range(0, len(summaries), batch_size):
+        results.extend(engine.classify_batch(summaries[i:i + batch_size], batch_size))
+    return results, time.perf_counter() - start
+
+
+def main(sample, top_k, batch_size):
+    conn = psycopg2.connect(**PG_CONFIG)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT bill_id, llm_summary
+        FROM bills_billtext
+        WHERE llm_summary IS NOT NULL
+        ORDER BY random()
+        LIMIT %s
+    """, (sample,))
+    bills = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    summaries = [s for _, s in bills]
+    print(f"Comparing on {len(summaries)} bills")
+
+    classifier = load_classifier()
+    full = FullTagger(classifier, load_labels())
+    prefilter = PrefilterTagger(classifier, load_tags(), top_k=top_k)
+
+    full_scores, full_secs = run(full, summaries, batch_size)
+    pre_scores, pre_secs = run(prefilter, summaries, batch_size)
+
+    pairs = [(f, p) for f, p in zip(full_scores, pre_scores) if f and p]
+    n = len(pairs)
+    top1 = sum(top_labels(f, 1) == top_labels(p, 1) for f, p in pairs)
+    top2 = sum(set(top_labels(f, 2)) == set(top_labels(p, 2)) for f, p in pairs)
+    relevant = sum(sum(1 for s in f.values() if s >= DISPLAY_THRESHOLD) for f, _ in pairs)
+    kept = sum(
+        sum(1 for label, s in f.items() if s >= DISPLAY_THRESHOLD and label in p)
+        for f, p in pairs
+    )
+    max_diff = max(
+        (abs(f[label] - s) for f, p in pairs for label, s in p.items()),
+        default=0.0,
+    )
+
+    print(f"\n--- Prefilter (top {prefilter.top_k}) vs full pass ---")
+    print(f"Full pass:       {full_secs:.1f}s ({n / full_secs if full_secs else 0:.2f} bills/s)")
+    print(f"Prefilter:       {pre_secs:.1f}s ({n / pre_secs if pre_secs else 0:.2f} bills/s)")
+    print(f"Speedup:         {full_secs / pre_secs if pre_secs else 0:.2f}x")
+    print(f"Top-1 agreement: {top1}/{n} ({top1 / n * 100 if n else 0:.1f}%)")
+    print(f"Top-2 agreement: {top2}/{n} ({top2 / n * 100 if n else 0:.1f}%)")
+    print(f"Labels >= {DISPLAY_THRESHOLD} kept: {kept}/{relevant} ({kept / relevant * 100 if relevant else 0:.1f}%)")
+    print(f"Max score diff on kept labels: {max_diff:.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare tagging engines.")
+    parser.add_argument("--sample", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    main(args.sample, max(1, args.top_k), max(1, args.batch_size))
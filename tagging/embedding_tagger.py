@@ -0,0 +1,172 @@
+"""
+Tag bills from their existing MiniLM vectors in Qdrant (or freshly encoded
+summaries) using EmbeddingTagger, and report agreement with the BART-MNLI
+tags already stored in llm_tags.
+
+Usage:
+    python tagging/embedding_tagger.py                      # agreement report only
+    python tagging/embedding_tagger.py --source summary     # encode llm_summary instead
+    python tagging/embedding_tagger.py --write              # also write to llm_tags_new
+"""
+
+import argparse
+import json
+import time
+from collections import Counter
+
+import boto3
+import numpy as np
+import psycopg2
+from qdrant_client import QdrantClient
+
+from tagger import (
+    EMBED_CENTER,
+    EMBED_SCALE,
+    EmbeddingTagger,
+    ensure_billtag_table,
+    load_tags,
+    write_tags,
+)
+
+COLLECTION_NAME = "bill_text_embeddings"
+
+ssm = boto3.client("ssm", region_name="ca-central-1")
+PARAMETER_NAMES = [
+    "/billBoard/DB_HOST",
+    "/billBoard/DB_PASSWORD",
+]
+
+
+def get_parameters(names, with_decryption=True):
+    response = ssm.get_parameters(Names=names, WithDecryption=with_decryption)
+    parameters = {p["Name"]: p["Value"] for p in response["Parameters"]}
+    if response["InvalidParameters"]:
+        print(f"Missing parameters: {response['InvalidParameters']}")
+    return parameters
+
+
+creds = get_parameters(PARAMETER_NAMES)
+PG_CONFIG = {
+    "dbname": "postgres",
+    "user": "postgres",
+    "password": creds["/billBoard/DB_PASSWORD"],
+    "host": creds["/billBoard/DB_HOST"],
+    "port": 5432,
+}
+
+
+def load_qdrant_vectors():
+    """Return (bill_ids, matrix) for every point in the collection."""
+    qdrant = QdrantClient("localhost", port=6333)
+    bill_ids, vectors = [], []
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=COLLECTION_NAME,
+            limit=512,
+            offset=offset,
+            with_payload=["bill_id"],
+            with_vectors=["text"],
+        )
+        for point in points:
+            bill_id = (point.payload or {}).get("bill_id")
+            vector = point.vector.get("text") if isinstance(point.vector, dict) else point.vector
+            if bill_id is not None and vector is not None:
+                bill_ids.append(int(bill_id))
+                vectors.append(vector)
+        if offset is None:
+            break
+    return bill_ids, np.asarray(vectors, dtype=np.float32)
+
+
+def top_labels(scores, n):
+    return [label for label, _ in sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n]]
+
+
+def main(source, write, column, center, scale):
+    tagger = EmbeddingTagger(load_tags(), center=center, scale=scale)
+
+    conn = psycopg2.connect(**PG_CONFIG)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT bill_id, llm_summary, llm_tags
+        FROM bills_billtext
+        WHERE llm_summary IS NOT NULL
+    """)
+    rows = cursor.fetchall()
+    bart = {}
+    for bill_id, _, tags_raw in rows:
+        if tags_raw:
+            bart[bill_id] = json.loads(tags_raw) if isinstance(tags_raw, str) else tags_raw
+
+    start = time.perf_counter()
+    if source == "qdrant":
+        bill_ids, vectors = load_qdrant_vectors()
+        load_secs = time.perf_counter() - start
+        start = time.perf_counter()
+        matrix = tagger.score_matrix(vectors)
+    else:
+        bill_ids = [bill_id for bill_id, _, _ in rows]
+        vectors = tagger.encoder.encode([s for _, s, _ in rows], normalize_embeddings=True)
+        load_secs = time.perf_counter() - start
+        start = time.perf_counter()
+        matrix = tagger.score_matrix(vectors)
+    score_secs = time.perf_counter() - start
+    results = dict(zip(bill_ids, tagger.to_dicts(matrix)))
+
+    n = len(results)
+    print(f"Scored {n} bills from {source}: load/encode {load_secs:.1f}s, "
+          f"scoring {score_secs * 1000:.1f}ms ({score_secs * 1000 / max(n, 1):.3f} ms/bill)")
+
+    # ── agreement with BART ──────────────────────────────────────────────
+    common = [b for b in results if b in bart and bart[b]]
+    top1 = sum(top_labels(results[b], 1) == top_labels(bart[b], 1) for b in common)
+    top2 = sum(set(top_labels(results[b], 2)) == set(top_labels(bart[b], 2)) for b in common)
+    top1_in_top3 = sum(top_labels(bart[b], 1)[0] in top_labels(results[b], 3) for b in common)
+    m = len(common)
+    print(f"\n--- Agreement with BART llm_tags ({m} bills) ---")
+    if m:
+        print(f"Top-1 agreement:          {top1 / m * 100:.1f}%")
+        print(f"Top-2 set agreement:      {top2 / m * 100:.1f}%")
+        print(f"BART top-1 in embed top-3: {top1_in_top3 / m * 100:.1f}%")
+
+        per_label = Counter()
+        per_label_hit = Counter()
+        confusions = Counter()
+        for b in common:
+            expected = top_labels(bart[b], 1)[0]
+            got = top_labels(results[b], 1)[0]
+            per_label[expected] += 1
+            if expected == got:
+                per_label_hit[expected] += 1
+            else:
+                confusions[(expected, got)] += 1
+        print("\nPer-label top-1 recall (BART label → embedding match):")
+        for label, count in per_label.most_common():
+            print(f"  {label:<40} {per_label_hit[label]:5d}/{count:<5d} ({per_label_hit[label] / count * 100:5.1f}%)")
+        print("\nMost common disagreements (BART → embedding):")
+        for (expected, got), count in confusions.most_common(10):
+            print(f"  {expected} → {got}: {count}")
+
+    if write:
+        ensure_billtag_table(cursor)
+        rows_out = list(results.items())
+        for i in range(0, len(rows_out), 500):
+            write_tags(cursor, rows_out[i:i + 500], column=column)
+        conn.commit()
+        print(f"\nWrote {len(rows_out)} tag sets to {column}")
+
+    cursor.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding-based fast tagger.")
+    parser.add_argument("--source", choices=["qdrant", "summary"], default="qdrant",
+                        help="Bill vectors from the Qdrant collection or encoded llm_summary")
+    parser.add_argument("--write", action="store_true", help="Write results to --column")
+    parser.add_argument("--column", choices=["llm_tags_new", "llm_tags"], default="llm_tags_new")
+    parser.add_argument("--center", type=float, default=EMBED_CENTER)
+    parser.add_argument("--scale", type=float, default=EMBED_SCALE)
+    args = parser.parse_args()
+    main(args.source, args.write, args.column, args.center, args.scale)
@@ -2,6 +2,7 @@
 Step 1: Find bills with low-confidence tags and analyze their summaries
 to identify common themes not covered by existing tags.
 """
+import argparse
 import json
 import psycopg2
 import os
@@ -39,59 +40,118 @@ with open(TAGS_PATH, 'r', encoding='utf-8') as f:
 EXISTING_CATEGORIES = list(tags_data.keys())
 
 CONFIDENCE_THRESHOLD = 0.45  # A bill is "low confidence" if its max tag score is below this
+REPORT_THRESHOLDS = [0.3, 0.35, 0.4, 0.45, 0.5, 0.6]
+HISTOGRAM_BUCKETS = 10
+
+# Max tag score as an IMMUTABLE function so it can back an expression index:
+# "bills below X" then becomes an index range scan instead of a full parse.
+MAX_SCORE_FUNCTION = """
+    CREATE OR REPLACE FUNCTION llm_tags_max_score(tags jsonb)
+    RETURNS double precision
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$ SELECT max(value::double precision) FROM jsonb_each_text(tags) $$
+"""
+MAX_SCORE_INDEX = """
+    CREATE INDEX IF NOT EXISTS bills_billtext_llm_tags_max_score_idx
+    ON bills_billtext (llm_tags_max_score(llm_tags))
+"""
+
+# One row per tagged bill: its top tag and score, computed in Postgres.
+SCORED_CTE = """
+    WITH scored AS (
+        SELECT bt.bill_id, top.tag, top.score
+        FROM bills_billtext bt
+        CROSS JOIN LATERAL (
+            SELECT key AS tag, value::double precision AS score
+            FROM jsonb_each_text(bt.llm_tags)
+            ORDER BY 2 DESC
+            LIMIT 1
+        ) top
+        WHERE bt.llm_tags IS NOT NULL AND bt.llm_summary IS NOT NULL
+    )
+"""
+
 
-def main():
+def score_stats(cursor, thresholds):
+    """Histogram and per-threshold counts in a single aggregate over all bills."""
+    hist_cols = ",\n".join(
+        f"count(*) FILTER (WHERE least(width_bucket(score, 0, 1, {HISTOGRAM_BUCKETS}), "
+        f"{HISTOGRAM_BUCKETS}) = {b})"
+        for b in range(1, HISTOGRAM_BUCKETS + 1)
+    )
+    threshold_cols = ",\n".join(
+        "count(*) FILTER (WHERE score < %s)" for _ in thresholds
+    )
+    cursor.execute(
+        f"{SCORED_CTE} SELECT count(*), {hist_cols}, {threshold_cols} FROM scored",
+        list(thresholds),
+    )
+    row = cursor.fetchone()
+    total = row[0]
+    histogram = list(row[1:1 + HISTOGRAM_BUCKETS])
+    below = dict(zip(thresholds, row[1 + HISTOGRAM_BUCKETS:]))
+    return total, histogram, below
+
+
+def fetch_low_confidence(cursor, threshold):
+    # The llm_tags_max_score() predicate lets the expression index (if
+    # created) narrow the scan before any JSON is expanded.
+    cursor.execute("""
+        SELECT bt.bill_id, bt.llm_summary, bt.llm_tags, top.score, top.tag
+        FROM bills_billtext bt
+        CROSS JOIN LATERAL (
+            SELECT key AS tag, value::double precision AS score
+            FROM jsonb_each_text(bt.llm_tags)
+            ORDER BY 2 DESC
+            LIMIT 1
+        ) top
+        WHERE bt.llm_tags IS NOT NULL
+          AND bt.llm_summary IS NOT NULL
+          AND llm_tags_max_score(bt.llm_tags) < %s
+        ORDER BY top.score
+    """, (threshold,))
+    return [
+        {
+            'bill_id': bill_id,
+            'summary': summary,
+            'tags': json.loads(tags) if isinstance(tags, str) else tags,
+            'max_score': score,
+            'top_tag': tag,
+        }
+        for bill_id, summary, tags, score, tag in cursor.fetchall()
+    ]
+
+
+def main(threshold=CONFIDENCE_THRESHOLD, thresholds=REPORT_THRESHOLDS, create_index=False):
     conn = psycopg2.connect(**PG_CONFIG)
     cursor = conn.cursor()
     print("Connected to DB")
 
-    # Get all bills that have llm_tags
-    cursor.execute("""
-        SELECT bill_id, llm_summary, llm_tags
-        FROM bills_billtext
-        WHERE llm_tags IS NOT NULL AND llm_summary IS NOT NULL
-    """)
-    all_bills = cursor.fetchall()
-    print(f"\nTotal bills with tags: {len(all_bills)}")
-
-    low_confidence_bills = []
-    all_max_scores = []
-
-    for bill_id, summary, tags_raw in all_bills:
-        if tags_raw is None:
-            continue
-        # tags_raw might be a string or dict depending on driver
-        if isinstance(tags_raw, str):
-            tags = json.loads(tags_raw)
-        else:
-            tags = tags_raw
-
-        if not tags:
-            continue
-
-        max_score = max(tags.values())
-        all_max_scores.append(max_score)
-
-        if max_score < CONFIDENCE_THRESHOLD:
-            # Get the top tag for reference
-            top_tag = max(tags, key=tags.get)
-            low_confidence_bills.append({
-                'bill_id': bill_id,
-                'summary': summary,
-                'tags': tags,
-                'max_score': max_score,
-                'top_tag': top_tag,
-            })
+    cursor.execute(MAX_SCORE_FUNCTION)
+    if create_index:
+        cursor.execute(MAX_SCORE_INDEX)
+        print("Ensured index on llm_tags_max_score(llm_tags)")
+    conn.commit()
+
+    thresholds = sorted(set(thresholds) | {threshold})
+    total, histogram, below = score_stats(cursor, thresholds)
+    print(f"\nTotal bills with tags: {total}")
 
     # Stats
     print(f"\n--- Score Distribution ---")
-    brackets = [(0, 0.1), (0.1, 0.2), (0.2, 0.3), (0.3, 0.4), (0.4, 0.5),
-                (0.5, 0.6), (0.6, 0.7), (0.7, 0.8), (0.8, 0.9), (0.9, 1.01)]
-    for lo, hi in brackets:
-        count = sum(1 for s in all_max_scores if lo <= s < hi)
-        print(f"  [{lo:.1f}, {hi:.1f}): {count} bills")
+    width = 1.0 / HISTOGRAM_BUCKETS
+    for i, count in enumerate(histogram):
+        lo, hi = i * width, (i + 1) * width
+        close = "]" if i == HISTOGRAM_BUCKETS - 1 else ")"
+        print(f"  [{lo:.1f}, {hi:.1f}{close}: {count} bills")
+
+    print("\n--- Bills below each threshold ---")
+    for t in thresholds:
+        pct = 100.0 * below[t] / total if total else 0.0
+        print(f"  < {t:.2f}: {below[t]} bills ({pct:.1f}%)")
 
-    print(f"\nLow confidence bills (max score < {CONFIDENCE_THRESHOLD}): {len(low_confidence_bills)}")
+    low_confidence_bills = fetch_low_confidence(cursor, threshold)
+    print(f"\nLow confidence bills (max score < {threshold}): {len(low_confidence_bills)}")
 
     # Show top tags distribution among low confidence bills
     top_tag_dist = Counter(b['top_tag'] for b in low_confidence_bills)
@@ -115,4 +175,23 @@ def main():
     conn.close()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Report bills whose best tag score is low")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=CONFIDENCE_THRESHOLD,
+        help=f"Max-score cutoff for the detailed report (default: {CONFIDENCE_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--thresholds",
+        type=lambda v: [float(x) for x in v.split(",") if x.strip()],
+        default=REPORT_THRESHOLDS,
+        help="Comma-separated cutoffs to count in the same scan",
+    )
+    parser.add_argument(
+        "--create-index",
+        action="store_true",
+        help="Create an expression index on the max tag score",
+    )
+    args = parser.parse_args()
+    main(threshold=args.threshold, thresholds=args.thresholds, create_index=args.create_index)
@@ -0,0 +1,96 @@
+"""
+One-off migration: llm_tags columns JSON -> JSONB, plus the normalized
+bills_billtag (bill_id, tag, score) table.
+
+  python tagging/migrate_tags_jsonb.py
+
+Safe to re-run: columns already stored as jsonb are left alone and
+bills_billtag is rebuilt from llm_tags. Everything runs in one transaction.
+"""
+import boto3
+import psycopg2
+
+from tagger import BILLTAG_TABLE, CHECKPOINT_TABLE, ensure_billtag_table, sync_billtags
+
+# Database config
+ssm = boto3.client('ssm', region_name='ca-central-1')
+PARAMETER_NAMES = [
+    '/billBoard/DB_HOST',
+    '/billBoard/DB_PASSWORD',
+]
+
+def get_parameters(names, with_decryption=True):
+    response = ssm.get_parameters(Names=names, WithDecryption=with_decryption)
+    parameters = {param['Name']: param['Value'] for param in response['Parameters']}
+    if response['InvalidParameters']:
+        print(f"Missing parameters: {response['InvalidParameters']}")
+    return parameters
+
+creds = get_parameters(PARAMETER_NAMES)
+PG_CONFIG = {
+    "dbname": "postgres",
+    "user": "postgres",
+    "password": creds['/billBoard/DB_PASSWORD'],
+    "host": creds['/billBoard/DB_HOST'],
+    "port": 5432,
+}
+
+JSON_COLUMNS = [
+    ("bills_billtext", "llm_tags"),
+    ("bills_billtext", "llm_tags_new"),
+    ("bills_billtext", "llm_tags_old"),
+    (CHECKPOINT_TABLE, "tags"),
+]
+
+
+def column_type(cursor, table, column):
+    cursor.execute("""
+        SELECT data_type
+        FROM information_schema.columns
+        WHERE table_name = %s AND column_name = %s
+    """, (table, column))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def main():
+    conn = psycopg2.connect(**PG_CONFIG)
+    cursor = conn.cursor()
+    print("Connected to DB")
+
+    try:
+        # The expression index from find_low_confidence.py is typed on json
+        # and would block the ALTER; it is recreated on jsonb by that script.
+        cursor.execute("DROP INDEX IF EXISTS bills_billtext_llm_tags_max_score_idx")
+        cursor.execute("DROP FUNCTION IF EXISTS llm_tags_max_score(json)")
+
+        for table, column in JSON_COLUMNS:
+            current = column_type(cursor, table, column)
+            if current is None:
+                print(f"  {table}.{column}: not present, skipping")
+            elif current == "jsonb":
+                print(f"  {table}.{column}: already jsonb")
+            else:
+                cursor.execute(
+                    f"ALTER TABLE {table} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb"
+                )
+                print(f"  {table}.{column}: {current} -> jsonb")
+
+        ensure_billtag_table(cursor)
+        sync_billtags(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    cursor.execute(f"ANALYZE {BILLTAG_TABLE}")
+    conn.commit()
+    cursor.execute(f"SELECT count(*), count(DISTINCT bill_id) FROM {BILLTAG_TABLE}")
+    rows, bills = cursor.fetchone()
+    print(f"{BILLTAG_TABLE}: {rows} rows across {bills} bills")
+
+    cursor.close()
+    conn.close()
+
+if __name__ == "__main__":
+    main()
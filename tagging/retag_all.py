@@ -6,29 +6,48 @@ Steps:
      current llm_tags values into it as a backup.
   2. Re-run zero-shot classification on every bill that has an llm_summary,
      writing the fresh results into llm_tags.
+
+Progress is checkpointed in bills_tagging_checkpoint, keyed by (bill_id,
+model, label-set hash). An interrupted run resumes where it stopped, and
+bills whose summary hasn't changed since they were tagged with the same
+model and tags.json are skipped. Use --promote per-batch to make new tags
+live as each batch is written instead of at the end.
+
+Promotion copies tags from the checkpoint for this model and label set, so
+a comparison run with another engine (which also stages into llm_tags_new)
+never leaks into llm_tags; llm_tags_new is reset from the checkpoint at the
+start of each run for the same reason.
 """
 
 import argparse
-import json
-import os
-import collections.abc
 import boto3
 import psycopg2
-from transformers import pipeline
 
-# ---------------------------------------------------------------------------
-# Tags
-# ---------------------------------------------------------------------------
-TAGS_PATH = os.path.join(os.path.dirname(__file__), "tags.json")
-with open(TAGS_PATH, "r", encoding="utf-8") as f:
-    tags_data = json.load(f)
-CANDIDATE_LABELS = list(tags_data.keys())
-print(f"Candidate labels ({len(CANDIDATE_LABELS)}): {CANDIDATE_LABELS}")
+from tagger import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_TOP_K,
+    engine_id,
+    ensure_billtag_table,
+    ensure_checkpoint_table,
+    fetch_pending,
+    label_set_hash,
+    load_classifier,
+    load_labels,
+    make_engine,
+    promote_tags,
+    restore_staged,
+    summary_md5,
+    tag_in_batches,
+    tag_in_processes,
+    write_checkpoint,
+    write_tags,
+)
 
 # ---------------------------------------------------------------------------
 # Database credentials (via AWS SSM)
 # ---------------------------------------------------------------------------
-ssm = boto3.client("ssm", region_name="ca-central-1")
+# Looked up from main() rather than at import: --workers uses spawn, which
+# re-imports this module in every worker process.
 PARAMETER_NAMES = [
     "/billBoard/DB_HOST",
     "/billBoard/DB_PASSWORD",
@@ -36,6 +55,7 @@ PARAMETER_NAMES = [
 
 
 def get_parameters(names, with_decryption=True):
+    ssm = boto3.client("ssm", region_name="ca-central-1")
     response = ssm.get_parameters(Names=names, WithDecryption=with_decryption)
     parameters = {p["Name"]: p["Value"] for p in response["Parameters"]}
     if response["InvalidParameters"]:
@@ -43,138 +63,122 @@ def get_parameters(names, with_decryption=True):
     return parameters
 
 
-creds = get_parameters(PARAMETER_NAMES)
-PG_CONFIG = {
-    "dbname": "postgres",
-    "user": "postgres",
-    "password": creds["/billBoard/DB_PASSWORD"],
-    "host": creds["/billBoard/DB_HOST"],
-    "port": 5432,
-}
-
-
-# ---------------------------------------------------------------------------
-# Helpers
-# ---------------------------------------------------------------------------
-def classify_summary(classifier, summary):
-    """Run zero-shot classification and return a {label: score} dict or None."""
-    result = classifier(summary, CANDIDATE_LABELS, multi_label=True)
-
-    # Handle generator / list responses
-    if not isinstance(result, dict):
-        if result is not None and isinstance(result, collections.abc.Iterable):
-            result_list = list(result)
-            if len(result_list) > 0 and isinstance(result_list[0], dict):
-                result = result_list[0]
-            else:
-                return None
-        else:
-            return None
-
-    if isinstance(result, dict) and "labels" in result and "scores" in result:
-        return dict(zip(result["labels"], result["scores"]))
-    return None
+def pg_config():
+    creds = get_parameters(PARAMETER_NAMES)
+    return {
+        "dbname": "postgres",
+        "user": "postgres",
+        "password": creds["/billBoard/DB_PASSWORD"],
+        "host": creds["/billBoard/DB_HOST"],
+        "port": 5432,
+    }
 
 
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
-def main(untagged_only=False):
-    # 1. Load the classifier
-    print("Loading transformers pipeline (this may take a moment)...")
-    classifier = pipeline(
-        "zero-shot-classification",
-        model="facebook/bart-large-mnli",
-    )
+def main(untagged_only=False, batch_size=DEFAULT_BATCH_SIZE, engine="full", top_k=DEFAULT_TOP_K,
+         workers=1, threads_per_worker=None, promote="end", full_rerun=False):
+    candidate_labels = load_labels()
+    print(f"Candidate labels ({len(candidate_labels)}): {candidate_labels}")
+
+    # 1. Load the classifier (worker processes load their own copy instead)
+    print(f"Engine: {engine}" + (f" (NLI on top {top_k} labels)" if engine == "prefilter" else ""))
+    tagger = None
+    if workers <= 1:
+        print("Loading transformers pipeline (this may take a moment)...")
+        classifier = None if engine == "embedding" else load_classifier()
+        tagger = make_engine(classifier, engine, top_k)
 
     # 2. Connect to the database
-    conn = psycopg2.connect(**PG_CONFIG)
+    conn = psycopg2.connect(**pg_config())
     cursor = conn.cursor()
     print("Connected to DB")
 
     # 3. Create the staging column for new tags
     cursor.execute("""
         ALTER TABLE bills_billtext
-        ADD COLUMN IF NOT EXISTS llm_tags_new JSON
+        ADD COLUMN IF NOT EXISTS llm_tags_new JSONB
     """)
     conn.commit()
 
     # Also ensure the backup column exists for later
     cursor.execute("""
         ALTER TABLE bills_billtext
-        ADD COLUMN IF NOT EXISTS llm_tags_old JSON
+        ADD COLUMN IF NOT EXISTS llm_tags_old JSONB
     """)
+    ensure_checkpoint_table(cursor)
+    ensure_billtag_table(cursor)
     conn.commit()
     print("Prepared llm_tags_new and llm_tags_old columns")
 
-    # 4. Fetch bills that need tagging
+    model = engine_id(engine, top_k)
+    label_hash = label_set_hash()
+    if full_rerun:
+        cursor.execute(
+            "DELETE FROM bills_tagging_checkpoint WHERE model = %s AND label_hash = %s",
+            (model, label_hash),
+        )
+        conn.commit()
+        print("Cleared checkpoint for a full re-run")
+    print(f"Checkpoint: model={model} labels={label_hash}")
+    restored = restore_staged(cursor, model, label_hash)
+    conn.commit()
+    if restored:
+        print(f"Restored {restored} llm_tags_new values from the checkpoint "
+              f"(they held tags from another engine or label set)")
+
+    # 4. Fetch bills that need tagging (not yet checkpointed, or summary changed)
+    bills = fetch_pending(cursor, model, label_hash, untagged_only=untagged_only)
     if untagged_only:
-        cursor.execute("""
-            SELECT bill_id, llm_summary
-            FROM bills_billtext
-            WHERE llm_summary IS NOT NULL
-              AND llm_tags_new IS NULL
-        """)
         print("Mode: untagged-only (skipping bills that already have llm_tags_new)")
-    else:
-        cursor.execute("""
-            SELECT bill_id, llm_summary
-            FROM bills_billtext
-            WHERE llm_summary IS NOT NULL
-        """)
-    bills = cursor.fetchall()
+    md5s = {bill_id: summary_md5(summary) for bill_id, summary in bills}
     total = len(bills)
     print(f"Bills to re-tag: {total}")
 
-    # 5. Re-tag each bill
-    tagged = 0
-    errors = 0
-    for i, (bill_id, llm_summary) in enumerate(bills):
-        if not llm_summary:
-            continue
-        short_summary = llm_summary[:80] + "..." if len(llm_summary) > 80 else llm_summary
+    # 5. Re-tag in length-sorted batches: tags, checkpoint (and optionally
+    #    promotion) for a batch are committed together.
+    def write_batch(results):
+        rows = [(bill_id, scores) for bill_id, scores in results if scores is not None]
         try:
-            tag_scores = classify_summary(classifier, llm_summary)
-            if tag_scores is None:
-                print(f"  [{i+1}/{total}] bill_id={bill_id} | {short_summary} — no valid result, skipping")
-                continue
-
-            cursor.execute(
-                "UPDATE bills_billtext SET llm_tags_new = %s WHERE bill_id = %s",
-                (json.dumps(tag_scores), bill_id),
-            )
+            write_tags(cursor, rows, column="llm_tags_new")
+            write_checkpoint(cursor, rows, model, label_hash, md5s)
+            if promote == "per-batch":
+                promote_tags(cursor, model, label_hash, [bill_id for bill_id, _ in rows])
             conn.commit()
-            tagged += 1
-
-            top_tag = max(tag_scores, key=tag_scores.get)
-            top_score = tag_scores[top_tag]
-            print(f"  [{i+1}/{total}] bill_id={bill_id} | {short_summary} | top={top_tag} ({top_score:.3f})")
-
         except Exception as e:
-            print(f"  [{i+1}/{total}] bill_id={bill_id} | {short_summary} — ERROR: {e}")
+            print(f"  ERROR writing batch: {e}")
             conn.rollback()
-            errors += 1
-
-    # 6. Promote: backup llm_tags → llm_tags_old, then overwrite llm_tags with llm_tags_new
-    print("\nPromoting new tags...")
-    cursor.execute("""
-        UPDATE bills_billtext
-        SET llm_tags_old = llm_tags
-        WHERE llm_tags IS NOT NULL
-    """)
-    cursor.execute("""
-        UPDATE bills_billtext
-        SET llm_tags = llm_tags_new
-        WHERE llm_tags_new IS NOT NULL
-    """)
-    conn.commit()
-    print("Done: llm_tags backed up to llm_tags_old, llm_tags_new promoted to llm_tags")
+            return 0
+        return len(rows)
+
+    if workers > 1:
+        tagged, errors, elapsed = tag_in_processes(
+            engine, bills, write_batch, workers, batch_size=batch_size,
+            top_k=top_k, threads_per_worker=threads_per_worker,
+        )
+    else:
+        tagged, errors, elapsed = tag_in_batches(tagger, bills, write_batch, batch_size=batch_size)
+    rate = tagged / elapsed if elapsed else 0.0
+
+    # 6. Promote: backup llm_tags → llm_tags_old, then overwrite llm_tags with
+    #    this model's checkpointed tags (bills tagged only by other engines are untouched)
+    if promote == "end":
+        print("\nPromoting new tags...")
+        promoted = promote_tags(cursor, model, label_hash)
+        conn.commit()
+        print(f"Done: {promoted} bills backed up to llm_tags_old and promoted from the {model} checkpoint")
+    elif promote == "per-batch":
+        print("\nNew tags were promoted batch by batch")
+    else:
+        print("\nSkipped promotion; new tags are staged in llm_tags_new")
 
     # 7. Summary
     print(f"\n--- Summary ---")
     print(f"Total bills processed: {total}")
     print(f"Successfully re-tagged: {tagged}")
     print(f"Errors: {errors}")
+    print(f"Throughput: {rate:.2f} bills/s ({elapsed:.1f}s, batch size {batch_size}, workers {workers})")
 
     cursor.close()
     conn.close()
@@ -187,8 +191,59 @@ if __name__ == "__main__":
         action="store_true",
         help="Only tag bills that don't already have llm_tags_new",
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Summaries per pipeline call (default: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["full", "prefilter", "embedding"],
+        default="full",
+        help="full: NLI on every label; prefilter: bi-encoder shortlist, NLI on the top-k; "
+             "embedding: cosine similarity to category embeddings, no NLI",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=DEFAULT_TOP_K,
+        help=f"Labels kept by the prefilter engine (default: {DEFAULT_TOP_K})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Tagging processes, each with its own model copy (default: 1)",
+    )
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=None,
+        help="torch threads per worker (default: CPU count / workers)",
+    )
+    parser.add_argument(
+        "--promote",
+        choices=["end", "per-batch", "none"],
+        default="end",
+        help="When to copy llm_tags_new into llm_tags (default: end of run)",
+    )
+    parser.add_argument(
+        "--full-rerun",
+        action="store_true",
+        help="Ignore the checkpoint for this model and tag set and re-tag everything",
+    )
     args = parser.parse_args()
 
     mode = "untagged-only" if args.untagged_only else "all bills"
     print(f"Starting re-tag ({mode})...")
-    main(untagged_only=args.untagged_only)
+    main(
+        untagged_only=args.untagged_only,
+        batch_size=max(1, args.batch_size),
+        engine=args.engine,
+        top_k=max(1, args.top_k),
+        workers=max(1, args.workers),
+        threads_per_worker=args.threads_per_worker,
+        promote=args.promote,
+        full_rerun=args.full_rerun,
+    )
@@ -9,6 +9,8 @@ import collections.abc
 import boto3
 from transformers import pipeline
 
+from tagger import ensure_billtag_table, write_tags
+
 CONFIDENCE_THRESHOLD = 0.45
 
 # Load updated tags
@@ -51,6 +53,7 @@ def main():
     conn = psycopg2.connect(**PG_CONFIG)
     cursor = conn.cursor()
     print("Connected to DB")
+    ensure_billtag_table(cursor)
 
     # Find all bills that already have tags
     cursor.execute("""
@@ -105,10 +108,7 @@ def main():
                 new_max = max(tag_scores.values())
                 new_top = max(tag_scores, key=tag_scores.get)
 
-                cursor.execute(
-                    "UPDATE bills_billtext SET llm_tags = %s WHERE bill_id = %s",
-                    (json.dumps(tag_scores), bill_id)
-                )
+                write_tags(cursor, [(bill_id, tag_scores)])
                 conn.commit()
                 retagged += 1
 
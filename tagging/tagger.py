@@ -0,0 +1,515 @@
+"""
+Shared zero-shot tagging helpers used by the tagging scripts.
+
+The scripts used to call the BART-MNLI pipeline one summary at a time and
+commit after every row. ``tag_in_batches`` instead feeds an engine lists of
+summaries sorted by length (so padded batches waste little compute) and
+hands each batch of results to a callback that writes them with one
+``execute_values`` statement.
+
+Engines:
+  FullTagger       runs the NLI cross-encoder on every (summary, label) pair.
+  PrefilterTagger  ranks labels with a MiniLM bi-encoder whose label vectors
+                   are computed once, then runs NLI only on the top-k labels.
+                   With multi_label=True every label is scored independently,
+                   so the labels it keeps get the same scores as a full pass.
+  EmbeddingTagger  no NLI at all: cosine similarity between MiniLM bill
+                   vectors and category / sub-topic embeddings, squashed to
+                   0..1 so the output has the usual llm_tags shape.
+"""
+
+import collections.abc
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import psycopg2.extras
+
+TAGS_PATH = os.path.join(os.path.dirname(__file__), "tags.json")
+MODEL_NAME = "facebook/bart-large-mnli"
+PREFILTER_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+HYPOTHESIS_TEMPLATE = "This example is {}."  # the zero-shot pipeline's default
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_TOP_K = 6
+# Logistic calibration of cosine similarity for EmbeddingTagger. MiniLM
+# cosines for on-topic pairs sit around 0.3-0.6, so this maps ~0.25 to 0.5.
+EMBED_CENTER = 0.25
+EMBED_SCALE = 10.0
+
+
+def load_tags(path=TAGS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_labels(path=TAGS_PATH):
+    return list(load_tags(path).keys())
+
+
+def load_classifier(model=MODEL_NAME):
+    from transformers import pipeline
+    return pipeline("zero-shot-classification", model=model)
+
+
+def result_to_scores(result):
+    """Turn one pipeline result into a {label: score} dict, or None if unusable."""
+    if not isinstance(result, dict):
+        if result is not None and isinstance(result, collections.abc.Iterable):
+            result_list = list(result)
+            if len(result_list) > 0 and isinstance(result_list[0], dict):
+                result = result_list[0]
+            else:
+                return None
+        else:
+            return None
+
+    if isinstance(result, dict) and "labels" in result and "scores" in result:
+        return dict(zip(result["labels"], result["scores"]))
+    return None
+
+
+def classify_batch(classifier, summaries, labels, batch_size=DEFAULT_BATCH_SIZE):
+    """Classify a list of summaries in one pipeline call. Returns a list aligned with the input."""
+    results = classifier(summaries, labels, multi_label=True, batch_size=batch_size)
+    if isinstance(results, dict):
+        results = [results]
+    return [result_to_scores(r) for r in results]
+
+
+class FullTagger:
+    """Scores every candidate label with the zero-shot pipeline."""
+
+    def __init__(self, classifier, labels):
+        self.classifier = classifier
+        self.labels = labels
+
+    def classify_batch(self, summaries, batch_size=DEFAULT_BATCH_SIZE):
+        return classify_batch(self.classifier, summaries, self.labels, batch_size)
+
+
+def load_encoder():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(PREFILTER_MODEL_NAME)
+
+
+def label_centroids(encoder, tags):
+    """Unit vector per category: the mean of its name and sub-topic embeddings."""
+    vecs = []
+    for label, subtopics in tags.items():
+        emb = encoder.encode([label] + list(subtopics), normalize_embeddings=True)
+        centroid = np.asarray(emb).mean(axis=0)
+        vecs.append(centroid / np.linalg.norm(centroid))
+    return np.stack(vecs).astype(np.float32)
+
+
+class PrefilterTagger:
+    """Bi-encoder prefilter, then the NLI cross-encoder on the top-k labels only."""
+
+    def __init__(self, classifier, tags, top_k=DEFAULT_TOP_K, encoder=None):
+        self.classifier = classifier
+        self.labels = list(tags.keys())
+        self.top_k = min(top_k, len(self.labels))
+        self.encoder = encoder or load_encoder()
+
+        # Label side is fixed for the run: embed categories and build their
+        # NLI hypotheses once.
+        self.label_vecs = label_centroids(self.encoder, tags)
+        self.hypotheses = {label: HYPOTHESIS_TEMPLATE.format(label) for label in self.labels}
+
+        model_config = classifier.model.config
+        self.entailment_id = classifier.entailment_id
+        self.contradiction_id = -1 if self.entailment_id == 0 else 0
+        if self.entailment_id == -1:
+            raise ValueError(f"Model labels {model_config.label2id} have no entailment class")
+
+    def candidates(self, summaries):
+        """Top-k labels per summary by cosine similarity, best first."""
+        emb = np.asarray(self.encoder.encode(summaries, normalize_embeddings=True), dtype=np.float32)
+        sims = emb @ self.label_vecs.T
+        top = np.argpartition(-sims, self.top_k - 1, axis=1)[:, :self.top_k]
+        order = np.take_along_axis(sims, top, axis=1).argsort(axis=1)[:, ::-1]
+        top = np.take_along_axis(top, order, axis=1)
+        return [[self.labels[j] for j in row] for row in top]
+
+    def classify_batch(self, summaries, batch_size=DEFAULT_BATCH_SIZE):
+        import torch
+
+        candidates = self.candidates(summaries)
+        pairs = [
+            (i, label)
+            for i, labels in enumerate(candidates)
+            for label in labels
+        ]
+        tokenizer = self.classifier.tokenizer
+        model = self.classifier.model
+        scores = [dict() for _ in summaries]
+
+        for start in range(0, len(pairs), batch_size):
+            chunk = pairs[start:start + batch_size]
+            inputs = tokenizer(
+                [summaries[i] for i, _ in chunk],
+                [self.hypotheses[label] for _, label in chunk],
+                padding=True,
+                truncation="only_first",
+                return_tensors="pt",
+            ).to(model.device)
+            with torch.no_grad():
+                logits = model(**inputs).logits
+            entail_contr = logits[:, [self.contradiction_id, self.entailment_id]]
+            probs = entail_contr.softmax(dim=-1)[:, 1].tolist()
+            for (i, label), p in zip(chunk, probs):
+                scores[i][label] = p
+
+        return [
+            dict(sorted(s.items(), key=lambda item: item[1], reverse=True)) or None
+            for s in scores
+        ]
+
+
+class EmbeddingTagger:
+    """
+    Scores categories by cosine similarity alone. A category's raw score is
+    its best match among the category centroid and its sub-topics.
+    """
+
+    def __init__(self, tags, encoder=None, center=EMBED_CENTER, scale=EMBED_SCALE):
+        self.labels = list(tags.keys())
+        self.encoder = encoder or load_encoder()
+        self.center = center
+        self.scale = scale
+
+        rows = [label_centroids(self.encoder, tags)]
+        # Column layout: [centroids | subtopics of label 0 | subtopics of label 1 | ...]
+        self.owner = list(range(len(self.labels)))
+        for i, (label, subtopics) in enumerate(tags.items()):
+            if subtopics:
+                rows.append(np.asarray(
+                    self.encoder.encode(list(subtopics), normalize_embeddings=True), dtype=np.float32
+                ))
+                self.owner.extend([i] * len(subtopics))
+        self.targets = np.concatenate(rows)
+        owner = np.asarray(self.owner)
+        self.groups = [np.flatnonzero(owner == j) for j in range(len(self.labels))]
+
+    def score_matrix(self, vectors):
+        """(n_bills, n_labels) calibrated scores for unit-normalised bill vectors."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+        sims = vectors @ self.targets.T
+        best = np.full((len(vectors), len(self.labels)), -1.0, dtype=np.float32)
+        for j, cols in enumerate(self.groups):
+            best[:, j] = sims[:, cols].max(axis=1)
+        return 1.0 / (1.0 + np.exp(-(best - self.center) * self.scale))
+
+    def to_dicts(self, matrix):
+        out = []
+        for row in matrix:
+            order = np.argsort(-row)
+            out.append({self.labels[j]: float(row[j]) for j in order})
+        return out
+
+    def classify_batch(self, summaries, batch_size=DEFAULT_BATCH_SIZE):
+        vectors = self.encoder.encode(summaries, batch_size=batch_size, normalize_embeddings=True)
+        return self.to_dicts(self.score_matrix(vectors))
+
+
+def make_engine(classifier, engine="full", top_k=DEFAULT_TOP_K):
+    if engine == "prefilter":
+        return PrefilterTagger(classifier, load_tags(), top_k=top_k)
+    if engine == "embedding":
+        return EmbeddingTagger(load_tags())
+    return FullTagger(classifier, load_labels())
+
+
+def engine_id(engine="full", top_k=DEFAULT_TOP_K):
+    """Stable name for the model configuration that produced a set of tags."""
+    if engine == "prefilter":
+        return f"{MODEL_NAME}+{PREFILTER_MODEL_NAME}@top{top_k}"
+    if engine == "embedding":
+        return f"{PREFILTER_MODEL_NAME}@c{EMBED_CENTER}s{EMBED_SCALE}"
+    return MODEL_NAME
+
+
+def label_set_hash(tags=None):
+    """Hash of the label taxonomy; editing tags.json starts a fresh checkpoint."""
+    tags = tags if tags is not None else load_tags()
+    return hashlib.sha256(json.dumps(tags, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def write_tags(cursor, rows, column="llm_tags"):
+    """
+    Write [(bill_id, {label: score}), ...] into ``column`` in one statement.
+    Writes to the live llm_tags column also refresh bills_billtag.
+    """
+    if not rows:
+        return
+    psycopg2.extras.execute_values(cursor, f"""
+        UPDATE bills_billtext AS bt
+        SET {column} = v.tags::jsonb
+        FROM (VALUES %s) AS v(bill_id, tags)
+        WHERE bt.bill_id = v.bill_id
+    """, [(bill_id, json.dumps(scores)) for bill_id, scores in rows])
+    if column == "llm_tags":
+        sync_billtags(cursor, [bill_id for bill_id, _ in rows])
+
+
+# ---------------------------------------------------------------------------
+# Normalized tags
+# ---------------------------------------------------------------------------
+BILLTAG_TABLE = "bills_billtag"
+
+
+def ensure_billtag_table(cursor):
+    """One row per (bill, tag) so tag filters and top-N lookups hit an index."""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {BILLTAG_TABLE} (
+            bill_id INTEGER NOT NULL,
+            tag     TEXT NOT NULL,
+            score   DOUBLE PRECISION NOT NULL,
+            PRIMARY KEY (bill_id, tag)
+        )
+    """)
+    cursor.execute(f"""
+        CREATE INDEX IF NOT EXISTS {BILLTAG_TABLE}_tag_score_idx
+        ON {BILLTAG_TABLE} (tag, score DESC)
+    """)
+    cursor.execute(f"""
+        CREATE INDEX IF NOT EXISTS {BILLTAG_TABLE}_bill_score_idx
+        ON {BILLTAG_TABLE} (bill_id, score DESC) INCLUDE (tag)
+    """)
+
+
+def sync_billtags(cursor, bill_ids=None):
+    """Rebuild bills_billtag rows from llm_tags for ``bill_ids`` (all bills if None)."""
+    where = "" if bill_ids is None else "WHERE bill_id = ANY(%(ids)s)"
+    params = {"ids": list(bill_ids) if bill_ids is not None else None}
+    cursor.execute(f"DELETE FROM {BILLTAG_TABLE} {where}", params)
+    cursor.execute(f"""
+        INSERT INTO {BILLTAG_TABLE} (bill_id, tag, score)
+        SELECT DISTINCT ON (bt.bill_id, t.key) bt.bill_id, t.key, t.value::double precision
+        FROM bills_billtext bt
+        CROSS JOIN LATERAL jsonb_each_text(bt.llm_tags::jsonb) t
+        WHERE bt.llm_tags IS NOT NULL
+          {"AND bt.bill_id = ANY(%(ids)s)" if bill_ids is not None else ""}
+        ORDER BY bt.bill_id, t.key, bt.id DESC
+    """, params)
+
+
+def tag_in_batches(engine, bills, on_batch, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Tag [(bill_id, summary), ...] in length-sorted batches with ``engine``.
+
+    ``on_batch(results)`` is called with [(bill_id, scores or None), ...]
+    after every batch and returns how many of them it persisted; the rest
+    count as failed. Returns (tagged, failed, elapsed_seconds).
+    """
+    bills = sorted(((b, s) for b, s in bills if s), key=lambda item: len(item[1]))
+    tagged = 0
+    failed = 0
+    start = time.perf_counter()
+
+    for i in range(0, len(bills), batch_size):
+        batch = bills[i:i + batch_size]
+        try:
+            scores = engine.classify_batch([s for _, s in batch], batch_size)
+        except Exception as e:
+            print(f"  batch {i // batch_size + 1}: ERROR {e}")
+            scores = [None] * len(batch)
+        results = [(bill_id, sc) for (bill_id, _), sc in zip(batch, scores)]
+        saved = on_batch(results)
+        tagged += saved
+        failed += len(results) - saved
+        elapsed = time.perf_counter() - start
+        done = i + len(batch)
+        print(f"  [{done}/{len(bills)}] {tagged} tagged, {failed} failed | "
+              f"{done / elapsed:.2f} bills/s")
+
+    return tagged, failed, time.perf_counter() - start
+
+
+# ---------------------------------------------------------------------------
+# Checkpoints
+# ---------------------------------------------------------------------------
+CHECKPOINT_TABLE = "bills_tagging_checkpoint"
+
+
+def summary_md5(summary):
+    # Same digest as Postgres md5(llm_summary), so the skip check runs in SQL.
+    return hashlib.md5(summary.encode("utf-8")).hexdigest()
+
+
+def ensure_checkpoint_table(cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+            bill_id     INTEGER NOT NULL,
+            model       TEXT NOT NULL,
+            label_hash  TEXT NOT NULL,
+            summary_md5 TEXT NOT NULL,
+            tags        JSONB NOT NULL,
+            tagged_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (bill_id, model, label_hash)
+        )
+    """)
+
+
+def fetch_pending(cursor, model, label_hash, untagged_only=False):
+    """
+    Bills with no checkpoint for (model, label_hash), or whose summary changed
+    since it was written. Already-done bills are filtered in SQL, so their
+    summaries are never transferred.
+    """
+    extra = "AND bt.llm_tags_new IS NULL" if untagged_only else ""
+    cursor.execute(f"""
+        SELECT DISTINCT ON (bt.bill_id) bt.bill_id, bt.llm_summary
+        FROM bills_billtext bt
+        LEFT JOIN {CHECKPOINT_TABLE} c
+               ON c.bill_id = bt.bill_id
+              AND c.model = %s
+              AND c.label_hash = %s
+        WHERE bt.llm_summary IS NOT NULL
+          AND (c.bill_id IS NULL OR c.summary_md5 <> md5(bt.llm_summary))
+          {extra}
+        ORDER BY bt.bill_id
+    """, (model, label_hash))
+    return cursor.fetchall()
+
+
+def write_checkpoint(cursor, rows, model, label_hash, md5s):
+    """Record [(bill_id, scores), ...] as done for (model, label_hash)."""
+    if not rows:
+        return
+    psycopg2.extras.execute_values(cursor, f"""
+        INSERT INTO {CHECKPOINT_TABLE} (bill_id, model, label_hash, summary_md5, tags)
+        VALUES %s
+        ON CONFLICT (bill_id, model, label_hash) DO UPDATE
+        SET summary_md5 = EXCLUDED.summary_md5,
+            tags = EXCLUDED.tags,
+            tagged_at = now()
+    """, [
+        (bill_id, model, label_hash, md5s[bill_id], json.dumps(scores))
+        for bill_id, scores in rows
+    ])
+
+
+def restore_staged(cursor, model, label_hash):
+    """
+    Reset llm_tags_new to this (model, label_hash)'s checkpointed tags.
+    Every engine (and embedding_tagger.py --write) stages into the same
+    column, so bills skipped by the checkpoint may hold another model's tags.
+    Returns the number of rows reset.
+    """
+    cursor.execute(f"""
+        UPDATE bills_billtext bt
+        SET llm_tags_new = c.tags
+        FROM {CHECKPOINT_TABLE} c
+        WHERE c.bill_id = bt.bill_id
+          AND c.model = %s
+          AND c.label_hash = %s
+          AND c.summary_md5 = md5(bt.llm_summary)
+          AND bt.llm_tags_new IS DISTINCT FROM c.tags
+    """, (model, label_hash))
+    return cursor.rowcount
+
+
+def promote_tags(cursor, model, label_hash, bill_ids=None):
+    """
+    Back up llm_tags to llm_tags_old and promote the checkpointed tags of
+    (model, label_hash) for ``bill_ids`` (every checkpointed bill if None),
+    keeping bills_billtag in step. Promoting from the checkpoint rather than
+    llm_tags_new means only bills tagged by this model are touched.
+    """
+    if bill_ids is not None and not bill_ids:
+        return 0
+    where = "" if bill_ids is None else "AND bt.bill_id = ANY(%(ids)s)"
+    cursor.execute(f"""
+        UPDATE bills_billtext bt
+        SET llm_tags_old = bt.llm_tags,
+            llm_tags = c.tags
+        FROM {CHECKPOINT_TABLE} c
+        WHERE c.bill_id = bt.bill_id
+          AND c.model = %(model)s
+          AND c.label_hash = %(label_hash)s
+          AND c.summary_md5 = md5(bt.llm_summary)
+          {where}
+        RETURNING bt.bill_id
+    """, {"model": model, "label_hash": label_hash,
+          "ids": list(bill_ids) if bill_ids is not None else None})
+    promoted = {row[0] for row in cursor.fetchall()}
+    sync_billtags(cursor, promoted)
+    return len(promoted)
+
+
+# ---------------------------------------------------------------------------
+# Multi-process tagging
+# ---------------------------------------------------------------------------
+_worker_engine = None
+
+
+def _init_worker(engine, top_k, threads):
+    """Runs once per worker process: pin torch threads and load the model."""
+    global _worker_engine
+    import torch
+    torch.set_num_threads(threads)
+    classifier = None if engine == "embedding" else load_classifier()
+    _worker_engine = make_engine(classifier, engine, top_k)
+
+
+def _classify_in_worker(batch, batch_size):
+    scores = _worker_engine.classify_batch([s for _, s in batch], batch_size)
+    return [(bill_id, sc) for (bill_id, _), sc in zip(batch, scores)]
+
+
+def tag_in_processes(engine, bills, on_batch, workers, batch_size=DEFAULT_BATCH_SIZE,
+                     top_k=DEFAULT_TOP_K, threads_per_worker=None):
+    """
+    Like tag_in_batches, but shards length-sorted batches across ``workers``
+    processes that each load the model once. Results come back to this
+    process, which is the only one that calls ``on_batch`` (and so the only
+    DB writer). Returns (tagged, failed, elapsed_seconds).
+    """
+    threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    bills = sorted(((b, s) for b, s in bills if s), key=lambda item: len(item[1]))
+    batches = [bills[i:i + batch_size] for i in range(0, len(bills), batch_size)]
+    print(f"Tagging {len(bills)} bills in {len(batches)} batches across "
+          f"{workers} workers x {threads} torch threads")
+
+    tagged = 0
+    failed = 0
+    done = 0
+    start = time.perf_counter()
+    # spawn: forked children would inherit torch / tokenizer thread state.
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(engine, top_k, threads)) as pool:
+        queue = iter(batches)
+        in_flight = {}
+        while True:
+            # Keep two batches per worker queued so no worker sits idle.
+            while len(in_flight) < workers * 2:
+                batch = next(queue, None)
+                if batch is None:
+                    break
+                in_flight[pool.submit(_classify_in_worker, batch, batch_size)] = batch
+            if not in_flight:
+                break
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                batch = in_flight.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    print(f"  batch of {len(batch)}: ERROR {e}")
+                    results = [(bill_id, None) for bill_id, _ in batch]
+                saved = on_batch(results)
+                tagged += saved
+                failed += len(results) - saved
+                done += len(results)
+                elapsed = time.perf_counter() - start
+                print(f"  [{done}/{len(bills)}] {tagged} tagged, {failed} failed | "
+                      f"{done / elapsed:.2f} bills/s")
+
+    return tagged, failed, time.perf_counter() - start
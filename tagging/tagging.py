@@ -1,16 +1,20 @@
-import json
+import argparse
 import psycopg2
-import os
-import collections.abc
 import boto3
-from transformers import pipeline
+
+from tagger import (
+    DEFAULT_BATCH_SIZE,
+    FullTagger,
+    ensure_billtag_table,
+    load_classifier,
+    load_labels,
+    tag_in_batches,
+    write_tags,
+)
 
 print("All basic imports complete!")
 # Load tags from tags.json
-TAGS_PATH = os.path.join(os.path.dirname(__file__), 'tags.json')
-with open(TAGS_PATH, 'r', encoding='utf-8') as f:
-    tags_data = json.load(f)
-CANDIDATE_LABELS = list(tags_data.keys())
+CANDIDATE_LABELS = load_labels()
 
 # Database config (should match generate_summaries.py)
 ssm = boto3.client('ssm', region_name='ca-central-1')
@@ -44,14 +48,10 @@ PG_CONFIG = {
     "port": DB_PORT,
 }
 
-def main():
+def main(batch_size=DEFAULT_BATCH_SIZE):
     print("Loading transformers pipeline (this may take a moment)...")
 
-    
-    classifier = pipeline(
-        "zero-shot-classification",
-        model = "facebook/bart-large-mnli",
-    )
+    classifier = load_classifier()
 
     # Connect to db
     conn = psycopg2.connect(**PG_CONFIG)
@@ -61,68 +61,53 @@ def main():
     #add column if it isn't already there
     cursor.execute("""
     ALTER TABLE bills_billtext
-    ADD COLUMN IF NOT EXISTS llm_tags JSON
+    ADD COLUMN IF NOT EXISTS llm_tags JSONB
     """)
+    ensure_billtag_table(cursor)
 
+    # Top tag per bill from bills_billtag (index on bill_id, score DESC)
     cursor.execute(
         """
-        SELECT bill_id, llm_summary
-        FROM bills_billtext
-        WHERE llm_summary IS NOT NULL
-          AND llm_tags IS NOT NULL
-          AND (
-              SELECT key
-              FROM json_each_text(llm_tags)
-              ORDER BY value::float DESC
-              LIMIT 1
-          ) = 'Democracy & Governance'
+        SELECT bt.bill_id, bt.llm_summary
+        FROM bills_billtext bt
+        JOIN (
+            SELECT DISTINCT ON (bill_id) bill_id, tag
+            FROM bills_billtag
+            ORDER BY bill_id, score DESC
+        ) top ON top.bill_id = bt.bill_id
+        WHERE bt.llm_summary IS NOT NULL
+          AND top.tag = 'Democracy & Governance'
         """
     )
     bills = cursor.fetchall()
     print(len(bills))
 
-    for bill_id, llm_summary in bills:
-        if not llm_summary:
-            continue
-        try:
-            result = classifier(llm_summary, CANDIDATE_LABELS, multi_label=True)
-            # If result is not a dict, try to convert to list and take the first dict element
-            if not isinstance(result, dict):
-                if result is not None and isinstance(result, collections.abc.Iterable):
-                    result_list = list(result)
-                    if len(result_list) > 0 and isinstance(result_list[0], dict):
-                        result = result_list[0]
-                    else:
-                        print(f"No valid result for bill_id {bill_id}")
-                        continue
-                else:
-                    print(f"No valid result for bill_id {bill_id}")
-                    continue
-            if isinstance(result, dict) and 'labels' in result and 'scores' in result:
-                result = dict(result)  # type: ignore
-                tag_scores = dict(zip(result['labels'], result['scores']))
-                # Store as JSON in a new column, or update an existing one (assume column is 'llm_tags')
-                cursor.execute(
-                    """
-                    UPDATE bills_billtext
-                    SET llm_tags = %s
-                    WHERE bill_id = %s
-                    """,
-                    (json.dumps(tag_scores), bill_id)
-                )
-                conn.commit()
-                print(llm_summary)
-                print(f"Tagged bill_id {bill_id}: {tag_scores}")
-            else:
+    def write_batch(results):
+        rows = [(bill_id, scores) for bill_id, scores in results if scores is not None]
+        for bill_id, scores in results:
+            if scores is None:
                 print(f"No valid result for bill_id {bill_id}")
-                continue
+        try:
+            write_tags(cursor, rows, column="llm_tags")
+            conn.commit()
         except Exception as e:
-            print(f"Error tagging bill_id {bill_id}: {e}")
+            print(f"Error writing batch: {e}")
             conn.rollback()
+            return 0
+        return len(rows)
+
+    tagged, failed, elapsed = tag_in_batches(
+        FullTagger(classifier, CANDIDATE_LABELS), bills, write_batch, batch_size=batch_size
+    )
+    print(f"Tagged {tagged} bills ({failed} failed) in {elapsed:.1f}s "
+          f"({tagged / elapsed if elapsed else 0.0:.2f} bills/s)")
 
     cursor.close()
     conn.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-tag Democracy & Governance bills.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
     print("Starting tagging...")
-    main()   
\ No newline at end of file
+    main(batch_size=max(1, args.batch_size))   
\ No newline at end of file